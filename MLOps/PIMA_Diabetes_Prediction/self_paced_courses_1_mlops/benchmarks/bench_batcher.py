@@ -0,0 +1,85 @@
+"""
+Benchmark of the micro-batcher (deployment/batcher.py) against the per row predict path.
+
+In process, no HTTP: --clients threads each score single rows back to back, either with their
+own predict_proba call per row (the path app.py used) or through one MicroBatcher per max wait.
+Reports p50 / p99 latency per row, rows per second and the mean batch size.
+
+    MODEL_PATH=best_pima_diabetes_model_v1.joblib python benchmarks/bench_batcher.py --clients 1 8 32 --waits 0 1 2 5
+
+Without MODEL_PATH the model is downloaded from the Hugging Face Hub like the apps do.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import argparse
+import logging
+import time
+import sys
+import os
+
+import pandas as pd
+
+DEPLOYMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployment")
+sys.path.insert(0, DEPLOYMENT)
+from model_loader import ModelHandle  # noqa: E402
+from batcher import MicroBatcher  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("bench_batcher")
+
+XTEST_PATH = os.path.join(DEPLOYMENT, "..", "model_building", "Xtest.csv")
+FEATURES = ['preg', 'plas', 'pres', 'skin', 'test', 'mass', 'pedi', 'age']
+
+
+def percentile(latencies, q):
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def run(predict, rows, clients):
+    """Every client thread scores its share of the rows one at a time, returns (latencies, elapsed)"""
+    def client(share):
+        latencies = []
+        for row in share:
+            start = time.perf_counter()
+            predict(row)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    shares = [rows[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = [latency for share in executor.map(client, shares) for latency in share]
+    return latencies, time.perf_counter() - start
+
+
+def report(name, latencies, elapsed, extra=""):
+    logger.info(f"{name:>22}: p50 {statistics.median(latencies) * 1000:7.2f}ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms  {len(latencies) / elapsed:8,.0f} rows/s{extra}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="rows scored per scenario")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 1, 2, 5], help="max waits in ms")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    handle = ModelHandle(check_interval=0)
+    rows = pd.read_csv(XTEST_PATH)[FEATURES].sample(args.rows, replace=True, random_state=0).to_dict("records")
+
+    def per_row(row):
+        return handle.model.predict_proba(pd.DataFrame([row]))
+
+    for clients in args.clients:
+        logger.info(f"{clients} concurrent clients")
+        report("per row", *run(per_row, rows, clients))
+        for wait in args.waits:
+            batcher = MicroBatcher(handle.score, FEATURES, max_batch_size=args.max_batch_size, max_wait_ms=wait)
+            latencies, elapsed = run(batcher.predict, rows, clients)
+            batcher.close()
+            report(f"batched, wait {wait:g}ms", latencies, elapsed, f"  {batcher.rows / max(batcher.batches, 1):5.1f} rows/batch")
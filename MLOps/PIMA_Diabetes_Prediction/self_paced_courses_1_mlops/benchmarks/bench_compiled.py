@@ -0,0 +1,76 @@
+"""
+Benchmark of the compiled scorer (deployment/compiled_scorer.py) against the joblib pipeline.
+
+Reports the load time of both files (the pipeline load includes importing scikit-learn, run in a fresh
+interpreter each) and the predict_proba time per call for growing batch sizes, and checks that the
+predictions are identical.
+
+    python benchmarks/bench_compiled.py --joblib best_pima_diabetes_model_v1.joblib --npz best_pima_diabetes_model_v1.npz
+"""
+import subprocess
+import argparse
+import logging
+import time
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+DEPLOYMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployment")
+sys.path.insert(0, DEPLOYMENT)
+from compiled_scorer import CompiledScorer  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("bench_compiled")
+
+XTEST_PATH = os.path.join(DEPLOYMENT, "..", "model_building", "Xtest.csv")
+
+COLD_LOAD = """
+import time, sys
+start = time.perf_counter()
+{load}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def cold_load_ms(load):
+    """Load time in a fresh interpreter, imports included"""
+    code = COLD_LOAD.format(load=load)
+    output = subprocess.run([sys.executable, "-c", code], cwd=DEPLOYMENT, capture_output=True, text=True, check=True)
+    return float(output.stdout)
+
+
+def per_call_ms(predict_proba, X, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predict_proba(X)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--joblib", required=True)
+    parser.add_argument("--npz", required=True)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    args = parser.parse_args()
+    joblib_path, npz_path = os.path.abspath(args.joblib), os.path.abspath(args.npz)
+
+    logger.info(f"cold load: pipeline {cold_load_ms(f'import joblib; joblib.load({joblib_path!r})'):.1f}ms, "
+                f"compiled {cold_load_ms(f'from compiled_scorer import CompiledScorer; CompiledScorer.load({npz_path!r})'):.1f}ms, "
+                f"files {os.path.getsize(joblib_path):,} / {os.path.getsize(npz_path):,} bytes")
+
+    import joblib
+    pipeline, compiled = joblib.load(joblib_path), CompiledScorer.load(npz_path)
+    rows = pd.read_csv(XTEST_PATH)
+    for size in args.batch_sizes:
+        X = rows.sample(size, replace=True, random_state=size)
+        same = bool((pipeline.predict(X) == compiled.predict(X)).all())
+        diff = np.abs(pipeline.predict_proba(X) - compiled.predict_proba(X)).max()
+        repeat = max(3, 2000 // size)
+        logger.info(f"{size:>6} rows: pipeline {per_call_ms(pipeline.predict_proba, X, repeat):8.2f}ms  "
+                    f"compiled {per_call_ms(compiled.predict_proba, X, repeat):8.2f}ms  "
+                    f"predictions {'identical' if same else 'DIFFER'} (max probability difference {diff:.1e})")
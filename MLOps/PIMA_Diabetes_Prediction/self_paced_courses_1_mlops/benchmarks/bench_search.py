@@ -0,0 +1,50 @@
+"""
+Benchmark of the hyperparameter search strategies (model_building/search.py) on the local train / test split.
+
+For every strategy reports the time to the best model (search + refit), the number of candidates,
+the best cross validated recall, the test recall of the refitted model and the speedup over the
+exhaustive grid.
+
+    python benchmarks/bench_search.py --strategies grid halving random warm_start --n-jobs 2
+"""
+import argparse
+import logging
+import sys
+import os
+
+import pandas as pd
+from sklearn.metrics import recall_score
+
+MODEL_BUILDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_building")
+sys.path.insert(0, MODEL_BUILDING)
+from search import run_search, SEARCH_STRATEGIES, SEARCH_N_JOBS  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("bench_search")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategies", nargs="+", choices=SEARCH_STRATEGIES, default=list(SEARCH_STRATEGIES))
+    parser.add_argument("--n-jobs", type=int, default=SEARCH_N_JOBS)
+    args = parser.parse_args()
+
+    Xtrain = pd.read_csv(os.path.join(MODEL_BUILDING, "Xtrain.csv"))
+    Xtest = pd.read_csv(os.path.join(MODEL_BUILDING, "Xtest.csv"))
+    ytrain = pd.read_csv(os.path.join(MODEL_BUILDING, "ytrain.csv")).squeeze("columns")
+    ytest = pd.read_csv(os.path.join(MODEL_BUILDING, "ytest.csv")).squeeze("columns")
+
+    # the grid is the reference of the speedups, run it first
+    strategies = sorted(args.strategies, key=lambda strategy: strategy != "grid")
+    reference = None
+    for strategy in strategies:
+        result = run_search(Xtrain, ytrain, strategy=strategy, n_jobs=args.n_jobs)
+        reference = reference or result["time_to_best"]
+        test_recall = recall_score(ytest, result["best_model"].predict(Xtest))
+        params = {key.split("__")[-1]: value for key, value in result["best_params"].items()}
+        logger.info(f"{strategy:>10}: {result['time_to_best']:6.2f}s to best model "
+                    f"({reference / result['time_to_best']:4.1f}x), {result['candidates']:2} candidates, "
+                    f"CV recall {result['best_score']:.4f}, test recall {test_recall:.4f}, {params}")
@@ -0,0 +1,96 @@
+"""
+Load benchmark of the inference service (deployment/service.py).
+
+Needs httpx. Start the service first, then:
+    python benchmarks/bench_service.py --url http://localhost:8000 --requests 500 --concurrency 8
+
+Reports p50 / p99 request latency and rows per second for single row requests,
+JSON batches of growing size and one NDJSON stream. The rows are sampled from model_building/Xtest.csv.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import argparse
+import logging
+import time
+import json
+import os
+
+import httpx
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("bench_service")
+# one INFO line per request otherwise
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+XTEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_building", "Xtest.csv")
+
+
+def percentile(latencies, q):
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def report(name, latencies, rows, elapsed):
+    logger.info(f"{name:>12}: p50 {statistics.median(latencies) * 1000:7.2f}ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms  {rows / elapsed:10,.0f} rows/s")
+
+
+def load(client, path, payloads, concurrency):
+    """POST every payload with concurrency workers, returns (latencies, elapsed)"""
+    def post(payload):
+        start = time.perf_counter()
+        response = client.post(path, json=payload)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(post, payloads))
+    return latencies, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--stream-rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    rows = pd.read_csv(XTEST_PATH)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=args.url, timeout=120, limits=limits) as client:
+        client.get("/health").raise_for_status()
+
+        # single row requests
+        payloads = rows.sample(args.requests, replace=True, random_state=0).to_dict("records")
+        latencies, elapsed = load(client, "/predict", payloads, args.concurrency)
+        report("single", latencies, len(payloads), elapsed)
+
+        # JSON batches, one predict_proba call each
+        for size in args.batch_sizes:
+            count = max(args.requests // size, args.concurrency)
+            payloads = [{"rows": rows.sample(size, replace=True, random_state=i).to_dict("records")} for i in range(count)]
+            latencies, elapsed = load(client, "/predict/batch", payloads, args.concurrency)
+            report(f"batch {size}", latencies, size * count, elapsed)
+
+        # one NDJSON stream
+        cohort = rows.sample(args.stream_rows, replace=True, random_state=0).to_dict("records")
+        body = "".join(json.dumps(row) + "\n" for row in cohort).encode("utf-8")
+        start = time.perf_counter()
+        first, scored = None, 0
+        with client.stream("POST", "/predict/stream", content=body,
+                           headers={"Content-Type": "application/x-ndjson"}) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    first = first or time.perf_counter() - start
+                    scored += 1
+        elapsed = time.perf_counter() - start
+        logger.info(f"{'stream':>12}: {scored:,} rows in {elapsed:.2f}s, first result after {first * 1000:.1f}ms, "
+                    f"{scored / elapsed:10,.0f} rows/s")
@@ -1,13 +1,16 @@
-from huggingface_hub import hf_hub_download
-
 import streamlit as st
-import pandas as pd
 import os
-import joblib
+import time
 import logging
 from dotenv import load_dotenv
 load_dotenv(dotenv_path="../.env")
 
+from model_loader import ModelHandle
+from batcher import MicroBatcher
+
+# Streamlit reruns the whole script on every widget change
+rerun_start = time.perf_counter()
+
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s"
@@ -16,11 +19,22 @@ logger = logging.getLogger("app")
 
 HF_USERNAME = os.getenv("HF_USERNAME")
 logger.info("HF_USERNAME present: %s", "yes" if HF_USERNAME else "no")
-repo_id = f"{HF_USERNAME}/PIMA-Diabetes-Prediction"
 
-# Download and load the model
-model_path = hf_hub_download(repo_id=repo_id, filename="best_pima_diabetes_model_v1.joblib")                                       # enter the Hugging Face username here
-model = joblib.load(model_path)
+FEATURES = ['preg', 'plas', 'pres', 'skin', 'test', 'mass', 'pedi', 'age']
+
+# Download and load the model once per process, not on every rerun
+@st.cache_resource
+def get_model_handle():
+    return ModelHandle()
+
+
+# Predictions of all the sessions go through one micro-batcher
+@st.cache_resource
+def get_batcher():
+    return MicroBatcher(get_model_handle().score, FEATURES)
+
+
+batcher = get_batcher()
 
 # Streamlit UI for Machine Failure Prediction
 st.title("🧠PIMA Diabetes Prediction App 👩‍")
@@ -39,8 +53,8 @@ mass = st.number_input("Body Mass Index (BMI)", min_value=0.0, max_value=70.0, v
 pedi = st.number_input("Diabetes Pedigree Function", min_value=0.0, max_value=2.5, value=0.5, step=0.01)
 age = st.number_input("Age", min_value=1, max_value=120, value=30)
 
-# Assemble input into DataFrame
-input_data = pd.DataFrame([{
+# Assemble input into one row
+input_data = {
     'preg': preg,
     'plas': plas,
     'pres': pres,
@@ -49,12 +63,16 @@ input_data = pd.DataFrame([{
     'mass': mass,
     'pedi': pedi,
     'age': age
-}])
+}
 
 # Prediction button
 if st.button("Predict Diabetes"):
-    prediction = model.predict(input_data)[0]
+    predict_start = time.perf_counter()
+    prediction, _ = batcher.predict(input_data)
+    logger.debug(f"Prediction in {(time.perf_counter() - predict_start) * 1000:.1f}ms")
     result = "Diabetic" if prediction == 1 else "Non-Diabetic"
     st.subheader("Prediction Result:")
     st.success(f"The model predicts: **{result}**")
 
+logger.debug(f"Rerun in {(time.perf_counter() - rerun_start) * 1000:.1f}ms")
+
@@ -0,0 +1,100 @@
+"""
+Micro-batching of single row predictions.
+
+One predict_proba call on a row costs about as much as on hundreds of rows (the per call overhead
+of the ColumnTransformer, StandardScaler and the tree ensemble dominates), so the rows submitted
+concurrently by different requests are coalesced: a worker thread takes the first queued row, keeps
+collecting for at most max_wait_ms or until max_batch_size rows, scores them with one call and
+hands each caller its own result through a Future. With max_wait_ms = 0 only the rows already
+queued are batched, a lone request never waits.
+"""
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import logging
+import queue
+import time
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("batcher")
+
+# Largest number of rows scored together
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "64"))
+# Longest wait (ms) after the first queued row for more rows to join its batch
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "1"))
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces predict(row) calls from many threads into batched score(frame) calls,
+    score returns the (predictions, probabilities) arrays of the frame rows
+    """
+
+    def __init__(self, score: Callable[[pd.DataFrame], Tuple[np.ndarray, np.ndarray]], columns: Sequence[str],
+                 max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.score = score
+        self.columns = list(columns)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        """Queue one row, the Future resolves to its (prediction, probability)"""
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row: Dict[str, Any], timeout: Optional[float] = None) -> Tuple[int, float]:
+        return self.submit(row).result(timeout)
+
+    def _collect(self, first) -> List[Tuple[Dict[str, Any], Future]]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                # finish this batch, stop after it
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            # callers that gave up (cancelled futures) are left out
+            batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            rows, futures = zip(*batch)
+            try:
+                predictions, probabilities = self.score(pd.DataFrame.from_records(list(rows), columns=self.columns))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(rows)
+            for future, prediction, probability in zip(futures, predictions, probabilities):
+                future.set_result((int(prediction), float(probability)))
+
+    def close(self):
+        """Score the rows already queued, then stop the worker"""
+        self._queue.put(_STOP)
+        self._worker.join()
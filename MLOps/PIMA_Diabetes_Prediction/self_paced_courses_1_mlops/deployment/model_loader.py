@@ -0,0 +1,201 @@
+"""
+Model loading shared by app.py and service.py.
+
+The model is loaded once per process into a ModelHandle, the apps read handle.model on every
+request. The compiled form of the pipeline (compiled_scorer.py, a NumPy .npz) is preferred, the
+joblib pipeline is the fallback when the model repo has no compiled file or MODEL_FORMAT=joblib.
+The serving image (requirements.txt) only has NumPy for the compiled scorer, scikit-learn and joblib
+are an optional install (requirements-pipeline.txt). With them, score() calls of MODEL_PIPELINE_MIN_ROWS
+rows or more go to the joblib pipeline of the same model version (faster on large batches), loaded on the
+first such call, and a model repo without a compiled file can still be served. Without them the compiled
+scorer serves every call.
+Where the model comes from:
+  - MODEL_PATH set: that local file, the Hugging Face Hub is never contacted
+  - HF_HUB_OFFLINE=1: the copy already in the local Hugging Face cache
+  - otherwise: downloaded from the model repo (a cached copy is reused when it is current)
+MODEL_MMAP=1 loads the numpy arrays of the pipeline memory mapped (joblib mmap_mode="r"),
+processes on the same host then share the pages of the file instead of each holding a copy.
+
+When MODEL_CHECK_INTERVAL (seconds) is above 0 a background thread checks the model version
+(hub commit of the file, or the mtime of MODEL_PATH) and loads a new version aside before
+swapping it in, requests keep using the old model meanwhile and never wait for the check.
+"""
+from huggingface_hub import hf_hub_download, hf_hub_url, get_hf_file_metadata
+from huggingface_hub.constants import HF_HUB_OFFLINE
+from huggingface_hub.errors import EntryNotFoundError
+from typing import Any, Optional, Tuple
+import importlib.util
+import threading
+import logging
+import time
+import os
+from dotenv import load_dotenv
+load_dotenv(dotenv_path="../.env")
+
+from compiled_scorer import CompiledScorer, COMPILED_FILENAME
+
+logger = logging.getLogger("model_loader")
+
+HF_USERNAME = os.getenv("HF_USERNAME")
+MODEL_REPO_ID = f"{HF_USERNAME}/PIMA-Diabetes-Prediction"
+MODEL_FILENAME = "best_pima_diabetes_model_v1.joblib"
+# Local model file (.npz compiled or .joblib), skips the Hugging Face Hub entirely when set
+MODEL_PATH = os.getenv("MODEL_PATH")
+# "compiled" (falls back to joblib when missing) or "joblib"
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "compiled")
+# score() calls with at least this many rows use the joblib pipeline, sklearn's Cython tree traversal
+# is faster than the compiled scorer above ~500 rows (benchmarks/bench_compiled.py), 0 never switches
+# (only with requirements-pipeline.txt installed)
+MODEL_PIPELINE_MIN_ROWS = int(os.getenv("MODEL_PIPELINE_MIN_ROWS", "500"))
+# The joblib pipeline needs the optional requirements-pipeline.txt
+PIPELINE_INSTALLED = all(importlib.util.find_spec(name) is not None for name in ("joblib", "sklearn"))
+# Memory mapped loading of the joblib model arrays
+MODEL_MMAP = os.getenv("MODEL_MMAP", "0") == "1"
+# Seconds between two checks for a new model version, 0 disables the check
+MODEL_CHECK_INTERVAL = float(os.getenv("MODEL_CHECK_INTERVAL", "600"))
+
+
+class ModelHandle:
+    """The current model of the process, see the module docstring"""
+
+    def __init__(self, model_path: Optional[str] = MODEL_PATH, repo_id: str = MODEL_REPO_ID,
+                 filename: str = MODEL_FILENAME, mmap: bool = MODEL_MMAP,
+                 check_interval: float = MODEL_CHECK_INTERVAL, offline: bool = HF_HUB_OFFLINE,
+                 model_format: str = MODEL_FORMAT, pipeline_min_rows: int = MODEL_PIPELINE_MIN_ROWS):
+        self.model_path = model_path
+        self.repo_id = repo_id
+        self.filename = filename
+        # candidates in order of preference, the first one found in the repo is kept
+        self.filenames = [COMPILED_FILENAME, filename] if model_format == "compiled" else [filename]
+        self.mmap = mmap
+        self.offline = offline
+        # the large calls stay on the compiled scorer when the pipeline can't be loaded
+        self.pipeline_min_rows = pipeline_min_rows if PIPELINE_INSTALLED else 0
+        # (version, joblib pipeline) for the large calls, loaded on the first one
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+        start = time.perf_counter()
+        self.path, self.version = self._fetch()
+        fetched = time.perf_counter()
+        self.model = self._load(self.path)
+        self.loaded_at = time.time()
+        self.cold_start_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Cold start: model {self.source} (version {self.version}) ready in {self.cold_start_ms:.1f}ms "
+                    f"(fetch {(fetched - start) * 1000:.1f}ms, load {(time.perf_counter() - fetched) * 1000:.1f}ms"
+                    f"{', memory mapped' if self.mmap else ''})")
+
+        self._closed = threading.Event()
+        self._watcher = None
+        # nothing new can show up in offline mode
+        if check_interval > 0 and (model_path or not offline):
+            self._watcher = threading.Thread(target=self._watch, args=(check_interval,),
+                                             name="model-version-check", daemon=True)
+            self._watcher.start()
+
+    @property
+    def source(self) -> str:
+        return self.model_path or f"{self.repo_id}/{self.filename}"
+
+    def _fetch(self, revision: Optional[str] = None) -> Tuple[str, str]:
+        """(local path, version) of the model file"""
+        if self.model_path:
+            return self.model_path, str(os.stat(self.model_path).st_mtime_ns)
+        for filename in self.filenames:
+            try:
+                path = hf_hub_download(repo_id=self.repo_id, filename=filename, revision=revision,
+                                       local_files_only=self.offline)
+            except EntryNotFoundError:
+                if filename == self.filenames[-1]:
+                    raise
+                logger.info(f"No {filename} in {self.repo_id}, falling back to {self.filenames[-1]}")
+                continue
+            self.filename = filename
+            break
+        # hub cache layout: .../snapshots/<commit>/<filename>
+        return path, os.path.basename(os.path.dirname(path))
+
+    def score(self, frame) -> Tuple[Any, Any]:
+        """Class and probability of diabetes of every row of the frame, one predict_proba call"""
+        # one model for the whole batch, even if a new version is swapped in meanwhile
+        model = self.model
+        if isinstance(model, CompiledScorer) and 0 < self.pipeline_min_rows <= len(frame):
+            model = self._pipeline_model() or model
+        proba = model.predict_proba(frame)
+        # same decision as model.predict
+        predictions = model.classes_[proba.argmax(axis=1)]
+        return predictions, proba[:, list(model.classes_).index(1)]
+
+    def preload_pipeline(self):
+        """Load the joblib pipeline now rather than on the first large call"""
+        if isinstance(self.model, CompiledScorer) and self.pipeline_min_rows > 0:
+            self._pipeline_model()
+
+    def _pipeline_model(self) -> Optional[Any]:
+        """The joblib pipeline of the current version (loaded once), None when it is not available"""
+        version = self.version
+        with self._pipeline_lock:
+            if self._pipeline is None or self._pipeline[0] != version:
+                self._pipeline = (version, self._load_pipeline(version))
+            return self._pipeline[1]
+
+    def _load_pipeline(self, version: str) -> Optional[Any]:
+        try:
+            if self.model_path:
+                # the pipeline saved next to the local compiled file
+                path = os.path.splitext(self.model_path)[0] + ".joblib"
+            else:
+                path = hf_hub_download(repo_id=self.repo_id, filename=MODEL_FILENAME, revision=version,
+                                       local_files_only=self.offline)
+            start = time.perf_counter()
+            pipeline = self._load(path)
+        except Exception as e:
+            # the compiled scorer keeps serving every call, it is only slower on large ones
+            logger.warning(f"No joblib pipeline for large batches ({e}), using the compiled scorer")
+            return None
+        logger.info(f"Loaded the joblib pipeline for calls of {self.pipeline_min_rows}+ rows "
+                    f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return pipeline
+
+    def _load(self, path: str) -> Any:
+        if path.endswith(".npz"):
+            return CompiledScorer.load(path)
+        # scikit-learn only gets imported for the joblib pipeline
+        if not PIPELINE_INSTALLED:
+            raise ImportError(f"{path} is a joblib pipeline, loading it needs requirements-pipeline.txt")
+        import joblib
+        return joblib.load(path, mmap_mode="r" if self.mmap else None)
+
+    def _latest_version(self) -> str:
+        if self.model_path:
+            return str(os.stat(self.model_path).st_mtime_ns)
+        return get_hf_file_metadata(hf_hub_url(self.repo_id, self.filename)).commit_hash
+
+    def check_for_update(self) -> bool:
+        """Load and swap in a newer model version, True when the model changed"""
+        latest = self._latest_version()
+        if latest == self.version:
+            return False
+        start = time.perf_counter()
+        path, version = self._fetch(None if self.model_path else latest)
+        if os.path.realpath(path) == os.path.realpath(self.path) and not self.model_path:
+            # new commit in the repo, same model file
+            self.version = version
+            return False
+        model = self._load(path)
+        # one reference assignment, in flight requests finish on the old model
+        self.model, self.path, self.version, self.loaded_at = model, path, version, time.time()
+        logger.info(f"Hot swapped model {self.source} to version {version} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return True
+
+    def _watch(self, interval: float):
+        while not self._closed.wait(interval):
+            try:
+                self.check_for_update()
+            except Exception:
+                # keep serving the current model, the next check tries again
+                logger.exception("Model version check failed")
+
+    def close(self):
+        self._closed.set()
+        if self._watcher is not None:
+            self._watcher.join()
@@ -0,0 +1,191 @@
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+import pandas as pd
+import numpy as np
+import threading
+import json
+import io
+import os
+import time
+import logging
+from dotenv import load_dotenv
+load_dotenv(dotenv_path="../.env")
+
+from model_loader import ModelHandle
+from batcher import MicroBatcher
+
+# REST inference service around the same pipeline as app.py, for scoring patient cohorts from other systems
+#   uvicorn service:app --host 0.0.0.0 --port 8000
+# Every batch request (or stream chunk) is scored with a single vectorized model.predict_proba call,
+# concurrent single patient requests are micro-batched together (BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+
+logging.basicConfig(
+    level=logging.DEBUG,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("service")
+
+HF_USERNAME = os.getenv("HF_USERNAME")
+logger.info("HF_USERNAME present: %s", "yes" if HF_USERNAME else "no")
+# Rows scored per predict_proba call on the streaming endpoint
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "512"))
+# Largest accepted batch (rows) on the batch endpoints
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "100000"))
+
+FEATURES = ['preg', 'plas', 'pres', 'skin', 'test', 'mass', 'pedi', 'age']
+LABELS = {0: "Non-Diabetic", 1: "Diabetic"}
+
+
+# loaded once, a newer version is swapped in by the loader in the background
+handle = ModelHandle()
+# the batch endpoints score large frames with the joblib pipeline, loaded off the request path
+threading.Thread(target=handle.preload_pipeline, name="pipeline-preload", daemon=True).start()
+# concurrent single patient requests are scored together
+batcher = MicroBatcher(handle.score, FEATURES)
+app = FastAPI(title="PIMA Diabetes Prediction Service")
+
+
+class Patient(BaseModel):
+    preg: int = Field(..., ge=0, le=20, description="Number of Pregnancies")
+    plas: float = Field(..., ge=0, le=300, description="Plasma Glucose Concentration")
+    pres: float = Field(..., ge=0, le=200, description="Diastolic Blood Pressure (mm Hg)")
+    skin: float = Field(..., ge=0, le=100, description="Triceps Skinfold Thickness (mm)")
+    test: float = Field(..., ge=0, le=900, description="2-Hour Serum Insulin (mu U/ml)")
+    mass: float = Field(..., ge=0, le=70, description="Body Mass Index (BMI)")
+    pedi: float = Field(..., ge=0, le=2.5, description="Diabetes Pedigree Function")
+    age: int = Field(..., ge=1, le=120, description="Age")
+
+
+class Batch(BaseModel):
+    # plain dicts, the whole batch is validated at once as a DataFrame
+    rows: List[Dict[str, Any]]
+
+
+def to_frame(rows: pd.DataFrame) -> pd.DataFrame:
+    """Feature columns in training order as floats, 422 on missing or non numeric values"""
+    missing = [feature for feature in FEATURES if feature not in rows.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing feature columns: {', '.join(missing)}")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch larger than {MAX_BATCH_ROWS} rows")
+    try:
+        frame = rows[FEATURES].astype(float)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Non numeric feature value: {e}")
+    if frame.isna().any().any():
+        raise HTTPException(status_code=422, detail="Missing feature values")
+    return frame
+
+
+def results(predictions: np.ndarray, probabilities: np.ndarray, ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    rows = [
+        {"prediction": int(prediction), "label": LABELS[int(prediction)], "probability": round(float(probability), 6)}
+        for prediction, probability in zip(predictions, probabilities)
+    ]
+    if ids is not None:
+        for row, row_id in zip(rows, ids):
+            row["id"] = row_id
+    return rows
+
+
+def score_rows(rows: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Score a frame of rows, an optional 'id' column is echoed back with each result"""
+    start = time.perf_counter()
+    predictions, probabilities = handle.score(to_frame(rows))
+    logger.debug(f"Scored {len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f}ms")
+    ids = None
+    if "id" in rows.columns:
+        # rows without an id come back with a null id (NaN is not valid JSON)
+        ids = rows["id"].astype(object).where(rows["id"].notna(), None).tolist()
+    return results(predictions, probabilities, ids)
+
+
+def parse_line(line: bytes) -> Dict[str, Any]:
+    """One NDJSON line as a patient object, ValueError on bad UTF-8, bad JSON or a non object value"""
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError(f"Each line must be a JSON object, got {type(row).__name__}")
+    return row
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself. The stock one listens for the
+    client disconnect with receive() alongside the body, which steals the request chunks from request.stream()
+    (a disconnect still surfaces as ClientDisconnect in the iterator)
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "model": handle.source, "version": handle.version,
+            "loaded_at": handle.loaded_at, "cold_start_ms": round(handle.cold_start_ms, 1)}
+
+
+@app.post("/predict")
+def predict(patient: Patient):
+    """Single patient, coalesced with the concurrent ones into one predict_proba call"""
+    prediction, probability = batcher.predict(patient.model_dump())
+    return results([prediction], [probability])[0]
+
+
+@app.post("/predict/batch")
+def predict_batch(batch: Batch):
+    """JSON batch: {"rows": [{"preg": .., ..., "age": .., "id": optional}, ...]}"""
+    if not batch.rows:
+        return {"results": []}
+    return {"results": score_rows(pd.DataFrame.from_records(batch.rows))}
+
+
+@app.post("/predict/file")
+def predict_file(file: UploadFile = File(...)):
+    """CSV or Parquet upload (by file extension or content type), one row per patient"""
+    name = (file.filename or "").lower()
+    content = file.file.read()
+    try:
+        if name.endswith(".parquet") or file.content_type == "application/vnd.apache.parquet":
+            rows = pd.read_parquet(io.BytesIO(content))
+        else:
+            rows = pd.read_csv(io.BytesIO(content))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read the uploaded file: {e}")
+    return {"results": score_rows(rows)}
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    NDJSON in, NDJSON out: one patient object per line, results are streamed back
+    every STREAM_CHUNK_ROWS rows so arbitrarily large cohorts never sit in memory whole
+    """
+    async def scored_lines():
+        pending, buffer = [], b""
+        try:
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                pending.extend(parse_line(line) for line in lines if line.strip())
+                while len(pending) >= STREAM_CHUNK_ROWS:
+                    batch, pending = pending[:STREAM_CHUNK_ROWS], pending[STREAM_CHUNK_ROWS:]
+                    scored = await run_in_threadpool(score_rows, pd.DataFrame.from_records(batch))
+                    yield "".join(json.dumps(row) + "\n" for row in scored)
+            if buffer.strip():
+                pending.append(parse_line(buffer))
+            if pending:
+                scored = await run_in_threadpool(score_rows, pd.DataFrame.from_records(pending))
+                yield "".join(json.dumps(row) + "\n" for row in scored)
+        except ClientDisconnect:
+            logger.info("Client disconnected mid stream")
+        except (HTTPException, ValueError) as e:
+            # the status is already sent, the error ends the stream as a last line
+            # (ValueError covers the bad JSON and UTF-8 of parse_line and the pandas errors)
+            yield json.dumps({"error": getattr(e, "detail", str(e))}) + "\n"
+
+    return DuplexStreamingResponse(scored_lines(), media_type="application/x-ndjson")
@@ -0,0 +1,156 @@
+"""
+Hyperparameter search strategies for train.py (SEARCH_STRATEGY), all selecting on cross validated recall:
+  - grid: exhaustive GridSearchCV over param_grid, the reference
+  - halving: HalvingGridSearchCV over param_grid, every round keeps the best third of the candidates
+    and gives them three times more training rows
+  - random: RandomizedSearchCV, SEARCH_N_ITER draws over a space covering param_grid
+  - warm_start: the param_grid candidates, but for every (max_depth, subsample) and fold the n_estimators
+    values are fitted as one warm started model that keeps growing (75 trees, +25, +25) instead of
+    three models from scratch. Boosting keeps its random state across warm starts, so the scores and
+    the selected model are the same as the grid's
+The transformers are fitted once per fold and reused by every candidate (pipeline memory=, or fitted
+up front for warm_start). The workers are capped at SEARCH_N_JOBS, by default half the CPUs available to the
+process so a shared runner is not oversubscribed, and every fit runs with a single BLAS / OpenMP thread.
+"""
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV, ParameterGrid, check_cv
+from sklearn.compose import make_column_transformer
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.metrics import get_scorer
+from sklearn.base import clone
+from scipy.stats import randint, uniform
+from joblib import Parallel, delayed, Memory, cpu_count, parallel_config
+from threadpoolctl import threadpool_limits
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import tempfile
+import logging
+import shutil
+import time
+import os
+
+logger = logging.getLogger("search")
+
+SEARCH_STRATEGIES = ("grid", "halving", "random", "warm_start")
+SEARCH_STRATEGY = os.getenv("SEARCH_STRATEGY", "warm_start")
+# Parallel workers of the search, each one fits a single threaded model. Half the CPUs by default,
+# CI runners are shared with other jobs, SEARCH_N_JOBS=<cpus> takes the whole machine
+SEARCH_N_JOBS = int(os.getenv("SEARCH_N_JOBS", str(max(1, cpu_count() // 2))))
+# Candidates drawn by the random strategy
+SEARCH_N_ITER = int(os.getenv("SEARCH_N_ITER", "8"))
+CV_FOLDS = 5
+SCORING = "recall"
+
+numeric_features = ['preg', 'plas', 'pres', 'skin', 'test', 'mass', 'pedi', 'age']
+
+# Hyperparameter grid
+param_grid = {
+    'gradientboostingclassifier__n_estimators': [75, 100, 125],
+    'gradientboostingclassifier__max_depth': [2, 3, 4],
+    'gradientboostingclassifier__subsample': [0.5, 0.6]
+}
+
+# Randomized search space, covers the grid
+param_distributions = {
+    'gradientboostingclassifier__n_estimators': randint(75, 126),
+    'gradientboostingclassifier__max_depth': [2, 3, 4],
+    'gradientboostingclassifier__subsample': uniform(0.5, 0.1)
+}
+
+
+def build_pipeline(memory=None):
+    # Preprocessing pipeline
+    preprocessor = make_column_transformer(
+        (StandardScaler(), numeric_features)
+    )
+    # Define GB model
+    gb_model = GradientBoostingClassifier(random_state=42)
+    return make_pipeline(preprocessor, gb_model, memory=memory)
+
+
+def _fold_scores(pipeline, params: Dict[str, Any], n_estimators: List[int], X, y, train, test) -> List[float]:
+    """Recall on one fold for every n_estimators value, growing one warm started model"""
+    preprocessor = clone(pipeline.steps[0][1]).fit(X.iloc[train], y.iloc[train])
+    Xtrain, Xtest = preprocessor.transform(X.iloc[train]), preprocessor.transform(X.iloc[test])
+    model = clone(pipeline.steps[-1][1]).set_params(warm_start=True, **params)
+    scorer = get_scorer(SCORING)
+    scores = []
+    for n in n_estimators:
+        model.set_params(n_estimators=n).fit(Xtrain, y.iloc[train])
+        scores.append(scorer(model, Xtest, y.iloc[test]))
+    return scores
+
+
+def _warm_start_search(pipeline, X, y, n_jobs: int) -> Tuple[Dict[str, Any], float, int]:
+    """(best params, best mean recall, candidates) over param_grid, in the grid's order and tie breaking"""
+    prefix = 'gradientboostingclassifier__'
+    n_estimators = sorted(param_grid[prefix + 'n_estimators'])
+    others = {key: values for key, values in param_grid.items() if key != prefix + 'n_estimators'}
+    combos = list(ParameterGrid(others))
+    folds = list(check_cv(CV_FOLDS, y, classifier=True).split(X, y))
+
+    jobs = [(combo, train, test) for combo in combos for train, test in folds]
+    fold_scores = Parallel(n_jobs=n_jobs)(
+        delayed(_fold_scores)(pipeline, {key[len(prefix):]: value for key, value in combo.items()},
+                              n_estimators, X, y, train, test)
+        for combo, train, test in jobs
+    )
+    # mean over the folds of every (combo, n_estimators)
+    means = np.array(fold_scores).reshape(len(combos), len(folds), len(n_estimators)).mean(axis=1)
+    candidates = [({**combo, prefix + 'n_estimators': n}, means[i, j])
+                  for i, combo in enumerate(combos) for j, n in enumerate(n_estimators)]
+    # GridSearchCV ranks the candidates in ParameterGrid order and keeps the first best one
+    order = {tuple(sorted(params.items())): rank for rank, params in enumerate(ParameterGrid(param_grid))}
+    candidates.sort(key=lambda candidate: order[tuple(sorted(candidate[0].items()))])
+    best_params, best_score = max(candidates, key=lambda candidate: candidate[1])
+    return best_params, float(best_score), len(candidates)
+
+
+def run_search(Xtrain, ytrain, strategy: str = SEARCH_STRATEGY, n_jobs: int = SEARCH_N_JOBS) -> Dict[str, Any]:
+    """Search, then refit the best candidate on the whole training set (same as GridSearchCV(refit=True))"""
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{strategy}', use one of {', '.join(SEARCH_STRATEGIES)}")
+    ytrain = ytrain.squeeze("columns") if hasattr(ytrain, "columns") else ytrain
+    cache_dir = tempfile.mkdtemp(prefix="pima-search-")
+    start = time.perf_counter()
+    # one BLAS / OpenMP thread per fit, in this process and in the loky workers,
+    # otherwise every worker starts a thread per CPU on top of the n_jobs processes
+    with threadpool_limits(limits=1), parallel_config("loky", inner_max_num_threads=1):
+        try:
+            if strategy == "warm_start":
+                best_params, best_score, candidates = _warm_start_search(build_pipeline(), Xtrain, ytrain, n_jobs)
+            else:
+                # the fitted scaler of each fold is cached and reused by every candidate
+                pipeline = build_pipeline(memory=Memory(cache_dir, verbose=0))
+                if strategy == "grid":
+                    search = GridSearchCV(pipeline, param_grid, cv=CV_FOLDS, scoring=SCORING, n_jobs=n_jobs,
+                                          refit=False)
+                elif strategy == "halving":
+                    search = HalvingGridSearchCV(pipeline, param_grid, cv=CV_FOLDS, scoring=SCORING, n_jobs=n_jobs,
+                                                 factor=3, random_state=42, refit=False)
+                else:
+                    search = RandomizedSearchCV(pipeline, param_distributions, n_iter=SEARCH_N_ITER, cv=CV_FOLDS,
+                                                scoring=SCORING, n_jobs=n_jobs, random_state=42, refit=False)
+                search.fit(Xtrain, ytrain)
+                best_params, best_score = search.best_params_, float(search.best_score_)
+                candidates = len(search.cv_results_["params"])
+            search_time = time.perf_counter() - start
+
+            # refit without memory=, the saved model must not point to the cache directory
+            best_model = build_pipeline().set_params(**best_params).fit(Xtrain, ytrain)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+    logger.info(f"{strategy} search: {candidates} candidates in {search_time:.2f}s with {n_jobs} workers, "
+                f"best CV {SCORING} {best_score:.4f}, time to best model {elapsed:.2f}s")
+    return {
+        "strategy": strategy,
+        "best_model": best_model,
+        "best_params": best_params,
+        "best_score": best_score,
+        "candidates": candidates,
+        "search_time": search_time,
+        "time_to_best": elapsed,
+    }
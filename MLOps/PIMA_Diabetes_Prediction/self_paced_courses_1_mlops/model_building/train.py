@@ -1,21 +1,22 @@
 # for data manipulation
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import make_column_transformer
-from sklearn.pipeline import make_pipeline
-# for model training, tuning, and evaluation
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.model_selection import GridSearchCV
+# for model training, tuning, and evaluation (pipeline, grid and search strategies in search.py)
 from sklearn.metrics import classification_report
+from search import run_search
 # for model serialization
 import joblib
+import numpy as np
 # for creating a folder
 # for hugging face space authentication to upload files
 from huggingface_hub import HfApi, create_repo
 from huggingface_hub.utils import RepositoryNotFoundError
 
 import os
+import sys
 import logging
+# the compiled scorer lives with the app that serves it
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployment"))
+from compiled_scorer import compile_pipeline, save_compiled, CompiledScorer, COMPILED_FILENAME
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s"
@@ -41,44 +42,16 @@ ytrain = pd.read_csv(ytrain_path)
 ytest = pd.read_csv(ytest_path)
 
 
-# scale numeric features
-numeric_features = [
-    'preg',
-    'plas',
-    'pres',
-    'skin',
-    'test',
-    'mass',
-    'pedi',
-    'age'
-]
-
-# Preprocessing pipeline
-preprocessor = make_column_transformer(
-    (StandardScaler(), numeric_features)
-)
-
-# Define GB model
-gb_model = GradientBoostingClassifier(random_state=42)
-
-# Define hyperparameter grid
-param_grid = {
-    'gradientboostingclassifier__n_estimators': [75, 100, 125],
-    'gradientboostingclassifier__max_depth': [2, 3, 4],
-    'gradientboostingclassifier__subsample': [0.5, 0.6]
-}
-
-# Create pipeline
-model_pipeline = make_pipeline(preprocessor, gb_model)
-
-# Grid search with cross-validation
-grid_search = GridSearchCV(model_pipeline, param_grid, cv=5, scoring='recall', n_jobs=-1)
-grid_search.fit(Xtrain, ytrain)
+# Hyperparameter search with cross-validation, selected on recall
+# (SEARCH_STRATEGY=grid|halving|random|warm_start, SEARCH_N_JOBS workers)
+search = run_search(Xtrain, ytrain)
 
 
 # Best model
-best_model = grid_search.best_estimator_
-logger.info(f"Best Params:\n {grid_search.best_params_}")
+best_model = search["best_model"]
+logger.info(f"Best Params:\n {search['best_params']}")
+logger.info(f"Best CV recall: {search['best_score']:.4f}, time to best model: {search['time_to_best']:.2f}s "
+            f"({search['strategy']} search)")
 
 # Predict on training set
 y_pred_train = best_model.predict(Xtrain)
@@ -100,6 +73,18 @@ try:
 except Exception as e:
     logger.error(f"Exception Occurred Saving the Model {e}")
 
+# Compile the pipeline into flat NumPy arrays, served without scikit-learn (deployment/compiled_scorer.py)
+logger.info(f"Compiling the Best Model")
+compiled_arrays = compile_pipeline(best_model)
+compiled_model = CompiledScorer(compiled_arrays)
+for split, X in (("train", Xtrain), ("test", Xtest)):
+    mismatches = int((compiled_model.predict(X) != best_model.predict(X)).sum())
+    if mismatches:
+        raise RuntimeError(f"Compiled model disagrees with the pipeline on {mismatches} {split} rows")
+    max_diff = np.abs(compiled_model.predict_proba(X) - best_model.predict_proba(X)).max()
+    logger.info(f"Compiled model matches the pipeline on {split} (max probability difference {max_diff:.2e})")
+save_compiled(compiled_arrays, COMPILED_FILENAME)
+
 # Upload to Hugging Face
 repo_id = f"{HF_USERNAME}/PIMA-Diabetes-Prediction" # enter the Hugging Face username here
 repo_type = "model"
@@ -121,4 +106,11 @@ api.upload_file(
     path_in_repo="best_pima_diabetes_model_v1.joblib",
     repo_id=repo_id,
     repo_type=repo_type,
+)
+logger.info(f"Uploading Compiled Model to '{repo_id}'")
+api.upload_file(
+    path_or_fileobj=COMPILED_FILENAME,
+    path_in_repo=COMPILED_FILENAME,
+    repo_id=repo_id,
+    repo_type=repo_type,
 )
\ No newline at end of file
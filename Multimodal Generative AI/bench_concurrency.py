@@ -0,0 +1,97 @@
+"""
+Stress benchmark of the concurrent stock mutations.
+
+Fires thousands of overlapping add_stock / remove_stock calls against each storage engine
+and checks that no quantity went negative, that quantities and transaction logs agree
+and that the running aggregates match a full rescan.
+
+    python bench_concurrency.py --operations 20000 --workers 32
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import tempfile
+import logging
+import random
+import copy
+import time
+import os
+
+from inventory_store import open_store, InsufficientStockError
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s | %(levelname)s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger("bench_concurrency")
+
+SEED = {
+    f"ITEM{i:03}": {
+        "name": f"Item {i}", "category": "Bench", "quantity": 50, "min_threshold": 5, "price": 10.0,
+        "supplier": "Bench Supplier", "last_updated": "2025-01-01", "transactions": []
+    }
+    for i in range(5)
+}
+
+
+def mutate(store, item_code, quantity, sale):
+    try:
+        if sale:
+            store.remove_stock(item_code, quantity, 10.0, "2025-01-02")
+        else:
+            store.add_stock(item_code, quantity, 8.5, "2025-01-02")
+        return True
+    except InsufficientStockError:
+        return False
+
+
+def check_consistency(store, seed) -> list:
+    """Compare every quantity with the initial quantity plus the movements in its transaction log"""
+    errors = []
+    for code, initial in seed.items():
+        item = store.get_item(code)
+        transactions = store.transactions(code)
+        delta = sum(t['quantity'] if t['type'] == 'purchase' else -t['quantity'] for t in transactions)
+        if item['quantity'] < 0:
+            errors.append(f"{code}: negative quantity {item['quantity']}")
+        if initial['quantity'] + delta != item['quantity']:
+            errors.append(f"{code}: quantity {item['quantity']} != {initial['quantity']} + log {delta}")
+    return errors
+
+
+def run(backend, operations, workers, path=None):
+    store = open_store(backend, seed=copy.deepcopy(SEED), path=path)
+    rng = random.Random(42)
+    # more sales than purchases so the stock keeps hitting zero
+    plan = [(rng.choice(list(SEED)), rng.randint(1, 5), rng.random() < 0.6) for _ in range(operations)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda op: mutate(store, *op), plan))
+    elapsed = time.perf_counter() - start
+
+    applied = sum(results)
+    logged = sum(len(store.transactions(code)) for code in SEED)
+    errors = check_consistency(store, SEED)
+    if logged != applied:
+        errors.append(f"{logged} transactions logged for {applied} applied movements")
+    errors.extend(f"aggregates {error}" for error in store.check_indexes())
+
+    logger.info(f"{backend}: {operations} ops in {elapsed:.2f}s ({operations / elapsed:,.0f} ops/s), "
+                f"{applied} applied, {operations - applied} rejected for insufficient stock")
+    for error in errors:
+        logger.error(f"{backend}: {error}")
+    return not errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    ok = run("memory", args.operations, args.workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = run("sqlite", args.operations, args.workers, path=os.path.join(tmp, "bench.db")) and ok
+    logger.info("Consistent" if ok else "INCONSISTENT")
+    raise SystemExit(0 if ok else 1)
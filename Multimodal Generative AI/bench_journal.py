@@ -0,0 +1,95 @@
+"""
+Benchmark of the write-ahead journal of the in-memory store.
+
+For each fsync interval, fires concurrent add_stock / remove_stock calls against a journaled
+MemoryInventoryStore and reports throughput, mutation latency (p50 / p99) and fsyncs per mutation,
+then measures the recovery time of a journal of that size with and without a snapshot.
+
+    python bench_journal.py --operations 5000 --workers 16 --intervals 0 0.001 0.005 0.02
+"""
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import argparse
+import tempfile
+import logging
+import random
+import copy
+import time
+import os
+
+from inventory_store import open_store, MemoryInventoryStore, InsufficientStockError
+from bench_concurrency import SEED
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s | %(levelname)s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger("bench_journal")
+
+
+def timed_mutation(store, item_code, quantity, sale) -> float:
+    start = time.perf_counter()
+    try:
+        if sale:
+            store.remove_stock(item_code, quantity, 10.0, "2025-01-02")
+        else:
+            store.add_stock(item_code, quantity, 8.5, "2025-01-02")
+    except InsufficientStockError:
+        pass
+    return time.perf_counter() - start
+
+
+def run(journal_dir, fsync_interval, operations, workers):
+    # no periodic snapshot, the whole run stays in the journal for the recovery measure
+    store = open_store("memory", seed=copy.deepcopy(SEED), journal_dir=journal_dir,
+                       fsync_interval=fsync_interval, snapshot_interval=0)
+    rng = random.Random(42)
+    plan = [(rng.choice(list(SEED)), rng.randint(1, 5), rng.random() < 0.5) for _ in range(operations)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = sorted(executor.map(lambda op: timed_mutation(store, *op), plan))
+    elapsed = time.perf_counter() - start
+    fsyncs = store._journal.fsync_count
+    expected = {code: item for code, item in store.items()}
+    store.close()
+
+    logger.info(f"fsync interval {fsync_interval * 1000:g}ms: {operations / elapsed:,.0f} ops/s, "
+                f"p50 {statistics.median(latencies) * 1000:.2f}ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms, "
+                f"{fsyncs} fsyncs ({operations / max(fsyncs, 1):.1f} mutations per fsync)")
+
+    # recovery: snapshot + replay of the whole journal
+    start = time.perf_counter()
+    recovered = MemoryInventoryStore(copy.deepcopy(SEED), journal_dir=journal_dir, snapshot_interval=0)
+    replay_time = time.perf_counter() - start
+    ok = dict(recovered.items()) == expected
+    recovered.snapshot()
+    recovered.close()
+
+    # recovery: snapshot only
+    start = time.perf_counter()
+    recovered = MemoryInventoryStore(copy.deepcopy(SEED), journal_dir=journal_dir, snapshot_interval=0)
+    snapshot_time = time.perf_counter() - start
+    ok = ok and dict(recovered.items()) == expected
+    recovered.close()
+
+    logger.info(f"recovery: {replay_time * 1000:.1f}ms replaying {operations} records, "
+                f"{snapshot_time * 1000:.1f}ms from a fresh snapshot, state {'matches' if ok else 'DIFFERS'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0, 0.001, 0.005, 0.02],
+                        help="fsync intervals in seconds (0 = no wait, groups form during the fsyncs)")
+    args = parser.parse_args()
+
+    ok = True
+    for interval in args.intervals:
+        with tempfile.TemporaryDirectory() as tmp:
+            ok = run(os.path.join(tmp, "journal"), interval, args.operations, args.workers) and ok
+    raise SystemExit(0 if ok else 1)
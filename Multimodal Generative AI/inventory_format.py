@@ -0,0 +1,270 @@
+"""
+Text rendering of the InventoryManager tool payloads.
+
+The tools build plain dict payloads (numbers stay numbers). In the "json" output format the payload
+is returned as is, in the "text" format it goes through one of the render_* functions below,
+so the report strings are only built when a client asks for them.
+"""
+from typing import Dict, Any, Callable, Optional, Union
+import json
+import os
+
+OUTPUT_FORMATS = ("text", "json")
+DEFAULT_OUTPUT_FORMAT = os.getenv("INVENTORY_OUTPUT_FORMAT", "text").lower()
+
+STATUS_ICONS = {"CRITICAL": "🔴", "LOW": "🟡", "GOOD": "🟢"}
+
+
+def format_error(output_format: Optional[str]) -> Optional[str]:
+    """Error message of an unknown output format, None when it is a known one"""
+    if (output_format or DEFAULT_OUTPUT_FORMAT).lower() not in OUTPUT_FORMATS:
+        return f"Unknown output format '{output_format}', use one of {', '.join(OUTPUT_FORMATS)}"
+    return None
+
+
+def respond(payload: Dict[str, Any], renderer: Callable[[Dict[str, Any]], str],
+            output_format: Optional[str] = None, serialize: bool = False) -> Union[str, Dict[str, Any]]:
+    """
+    The payload in the requested format (default INVENTORY_OUTPUT_FORMAT).
+    Error payloads carry their message in 'error', which is the whole text response.
+    serialize returns JSON text instead of a dict, for the resources that must return a string.
+    """
+    error = format_error(output_format)
+    if error:
+        # reported in the default format, the payload is dropped
+        payload, output_format = {"error": error}, None
+    output_format = (output_format or DEFAULT_OUTPUT_FORMAT).lower()
+    if output_format == "json":
+        return json.dumps(payload) if serialize else payload
+    if "error" in payload:
+        return payload["error"]
+    return renderer(payload)
+
+
+def render_stock(p: Dict[str, Any]) -> str:
+    return f"""
+{STATUS_ICONS[p['status']]} Stock Report: {p['name']} ({p['item_code']})
+─────────────────────────────────────────────
+Current Stock: {p['quantity']} units
+Minimum Threshold: {p['min_threshold']} units
+Status: {p['status']}
+Unit Price: ${p['price']:.2f}
+Total Value: ${p['total_value']:.2f}
+Supplier: {p['supplier']}
+Last Updated: {p['last_updated']}
+"""
+
+
+def render_stock_added(p: Dict[str, Any]) -> str:
+    return f"""
+Stock Added Successfully!
+─────────────────────────
+Item: {p['name']} ({p['item_code']})
+Added: {p['quantity']} units
+Stock Level: {p['before']} → {p['after']} units
+Unit Cost: ${p['unit_cost']:.2f}
+Total Cost: ${p['total_cost']:.2f}
+"""
+
+
+def render_stock_removed(p: Dict[str, Any]) -> str:
+    warning = ""
+    if p['below_threshold']:
+        warning = f"\n WARNING: Stock below minimum threshold ({p['min_threshold']} units)!"
+    return f"""
+Stock Removed Successfully!
+─────────────────────────
+Item: {p['name']} ({p['item_code']})
+Removed: {p['quantity']} units
+Stock Level: {p['before']} → {p['after']} units
+Unit Price: ${p['unit_price']:.2f}
+Total Revenue: ${p['total_revenue']:.2f}{warning}
+"""
+
+
+def _alert_line(alert: Dict[str, Any]) -> str:
+    return f"  • {alert['name']} ({alert['item_code']}): {alert['quantity']} units (Min: {alert['min_threshold']})"
+
+
+def render_low_stock_alerts(p: Dict[str, Any]) -> str:
+    if not p['alerts']:
+        return "All items are well-stocked!"
+
+    lines = ["Stock Alerts", "=" * 50]
+    critical = [alert for alert in p['alerts'] if alert['status'] == "CRITICAL"]
+    low = [alert for alert in p['alerts'] if alert['status'] == "LOW"]
+    if critical:
+        lines += ["", "CRITICAL - Reorder Immediately:", *map(_alert_line, critical)]
+    if low:
+        lines += ["", "🟡 LOW STOCK - Consider Reordering:", *map(_alert_line, low)]
+    if p['next_cursor']:
+        more = "... more alerts"
+        if p['total'] is not None and p['next_offset'] is not None:
+            more = f"... {p['total'] - p['next_offset']} more alerts"
+        if p['next_offset'] is not None:
+            lines += ["", f"{more} (use offset={p['next_offset']})"]
+        else:
+            lines += ["", f"{more} (use cursor={p['next_cursor']})"]
+    return "\n".join(lines) + "\n"
+
+
+def render_most_critical(p: Dict[str, Any]) -> str:
+    if not p['items']:
+        return "All items are well-stocked!"
+
+    lines = [f"Top {len(p['items'])} Most Critical Items", "=" * 50]
+    for rank, item in enumerate(p['items'], 1):
+        lines.append(f"{rank:2}. {item['name']} ({item['item_code']}): {item['quantity']} units (Min: {item['min_threshold']})")
+    return "\n".join(lines)
+
+
+def render_summary(p: Dict[str, Any]) -> str:
+    title = "Inventory Summary"
+    if p['category']:
+        title += f" - {p['category'].title()}"
+    if p['supplier']:
+        title += f" - {p['supplier']}"
+    if p['status']:
+        title += f" - {p['status']}"
+    lines = [title, "=" * 60]
+
+    # Category breakdown
+    for cat, stats in p['categories'].items():
+        lines += ["", f"{cat}:",
+                  f"   Items: {stats['items']} types",
+                  f"   Total Units: {stats['quantity']}",
+                  f"   Total Value: ${stats['value']:,.2f}"]
+
+    lines += ["",
+              f" Grand Total: ${p['total_value']:,.2f}",
+              f" Total Units: {p['total_units']:,}",
+              f" Unique Items: {p['unique_items']}"]
+    if p['next_cursor']:
+        lines += ["", f"... more categories (use cursor={p['next_cursor']})"]
+    return "\n".join(lines)
+
+
+def render_transactions(p: Dict[str, Any]) -> str:
+    if not p['total']:
+        return f"No transaction history found for {p['name']} ({p['item_code']})."
+
+    lines = [f"Transaction History: {p['name']} ({p['item_code']})", "=" * 60]
+    for i, trans in enumerate(p['transactions'], p['offset'] + 1):
+        unit = trans['unit_cost'] if trans['type'] == 'purchase' else trans['unit_price']
+        lines.append(f"{i:2}. {trans['date']} | {trans['type'].title()} | "
+                     f"{trans['quantity']} units @ ${unit:.2f} each = ${unit * trans['quantity']:.2f}")
+
+    remaining = p['total'] - p['offset'] - len(p['transactions'])
+    text = "\n".join(lines) + "\n"
+    if remaining > 0:
+        text += f"\n... and {remaining} more transactions"
+    return text
+
+
+def render_financials(p: Dict[str, Any]) -> str:
+    period = f"{p['start_date'] or 'beginning'} → {p['end_date'] or 'today'}"
+    return f"""
+Financials: {p['name']} ({p['item_code']})
+─────────────────────────────────────────────
+Period: {period}
+Units Sold: {p['units_sold']}
+Revenue: ${p['revenue']:,.2f}
+Cost of Goods Sold: ${p['cogs']:,.2f}
+Gross Margin: ${p['gross_margin']:,.2f}
+Units Purchased: {p['units_purchased']}
+Purchase Cost: ${p['purchase_cost']:,.2f}
+"""
+
+
+def render_item_created(p: Dict[str, Any]) -> str:
+    return f"""
+New Item Created Successfully!
+─────────────────────────────────
+Item Code: {p['item_code']}
+Name: {p['name']}
+Category: {p['category']}
+Initial Stock: {p['quantity']} units
+Price: ${p['price']:.2f}
+Min Threshold: {p['min_threshold']} units
+Supplier: {p['supplier']}
+"""
+
+
+def render_dashboard(p: Dict[str, Any]) -> str:
+    categories = "".join(f"  └─ {cat}: {count} items\n" for cat, count in p['categories'].items())
+    return f"""
+INVENTORY DASHBOARD
+{'='*50}
+
+Quick Stats:
+  └─ Total Items: {p['total_items']} types
+  └─ Total Value: ${p['total_value']:,.2f}
+  └─ Low Stock Alerts: {p['low_stock_count']} items
+
+Categories:
+{categories}
+Action Required:
+  └─ Items needing reorder: {p['low_stock_count']}
+  └─ Use get_low_stock_alerts() for details
+
+Recent Activity:
+  └─ Use get_transaction_history() for item details
+"""
+
+
+def render_supplier_contacts(p: Dict[str, Any]) -> str:
+    lines = ["Supplier Contact Directory", "=" * 40]
+    for supplier in p['suppliers']:
+        lines += ["", supplier['name'], f"   {supplier['contact'] or ' Contact info not available'}",
+                  f"   Lead time: {supplier['lead_time_days']} days"]
+    if p['next_cursor']:
+        lines += ["", f"... more suppliers (use cursor={p['next_cursor']})"]
+    return "\n".join(lines) + "\n"
+
+
+def render_supplier(p: Dict[str, Any]) -> str:
+    return f"""
+Supplier Saved: {p['name']}
+─────────────────────────────────
+Contact: {p['contact'] or 'not available'}
+Lead Time: {p['lead_time_days']} days
+Items Supplied: {p['items']}
+"""
+
+
+def render_supplier_stock_value(p: Dict[str, Any]) -> str:
+    return f"""
+Supplier Stock: {p['name']}
+─────────────────────────────────────────────
+Contact: {p['contact'] or 'not available'}
+Lead Time: {p['lead_time_days']} days
+Items: {p['items']} types
+Total Units: {p['quantity']:,}
+Total Value: ${p['value']:,.2f}
+Items to Reorder: {p['reorder']}
+"""
+
+
+def render_supplier_reorder_needs(p: Dict[str, Any]) -> str:
+    if not p['suppliers']:
+        return "No open reorder needs, all items are well-stocked!"
+
+    lines = ["Reorder Needs by Supplier", "=" * 50]
+    for supplier in p['suppliers']:
+        lines += ["", f"{supplier['name']} (lead time {supplier['lead_time_days']} days, "
+                      f"{supplier['contact'] or 'no contact info'}):"]
+        lines += [f"{_alert_line(alert)} [{alert['status']}]" for alert in supplier['items']]
+    return "\n".join(lines) + "\n"
+
+
+def render_reorder_suggestions(p: Dict[str, Any]) -> str:
+    if not p['suggestions']:
+        return f"No reorder needed within the supplier lead times (demand over the last {p['demand_window_days']} days)."
+
+    lines = [f"Reorder Suggestions (demand over the last {p['demand_window_days']} days)", "=" * 60]
+    for s in p['suggestions']:
+        cover = f"{s['days_of_cover']} days of cover" if s['days_of_cover'] is not None else "no recent sales"
+        lines.append(f"  • {s['name']} ({s['item_code']}) from {s['supplier']}: order {s['order_quantity']} units "
+                     f"- {s['quantity']} in stock, {s['daily_demand']}/day, {cover}, "
+                     f"{s['projected_at_delivery']} left after the {s['lead_time_days']} day lead time (Min: {s['min_threshold']})")
+    return "\n".join(lines) + "\n"
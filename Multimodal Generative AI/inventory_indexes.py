@@ -0,0 +1,370 @@
+"""
+Derived, incrementally maintained views of the inventory.
+
+The stores call apply(item_code, before, after) on every mutation (before is None for a new item),
+so the read endpoints are answered from these structures instead of a full scan of the catalog.
+"""
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple, List, Callable
+import threading
+import binascii
+import base64
+import bisect
+import json
+import math
+
+# entries copied per lock acquisition by the iterators, the lock is released between chunks
+CHUNK_SIZE = 256
+
+
+def stock_status(quantity: int, min_threshold: int) -> str:
+    if quantity <= min_threshold:
+        return "CRITICAL"
+    if quantity <= min_threshold * 2:
+        return "LOW"
+    return "GOOD"
+
+
+def encode_cursor(kind: str, key: Any) -> str:
+    """
+    Opaque pagination cursor of an index key (the last key of the previous page).
+    kind names the listing the cursor belongs to, a cursor is only accepted back by the same listing.
+    """
+    return base64.urlsafe_b64encode(json.dumps([kind, key]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(kind: str, cursor: str) -> Any:
+    try:
+        cursor_kind, key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    if cursor_kind != kind:
+        raise ValueError(f"Invalid cursor '{cursor}', it is not a cursor of this listing")
+    return tuple(key) if isinstance(key, list) else key
+
+
+def stock_ratio(quantity: int, min_threshold: int) -> float:
+    """quantity / min_threshold, CRITICAL items have a ratio <= 1 and LOW items <= 2"""
+    if min_threshold > 0:
+        return quantity / min_threshold
+    return 0.0 if quantity <= 0 else math.inf
+
+
+class InventoryAggregates:
+    """
+    Running totals updated in O(1) per mutation: total value and units
+    and per category item / unit / value counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.item_count = 0
+        self.total_quantity = 0
+        self.total_value = 0.0
+        # category -> {'items', 'quantity', 'value'}, in first seen order
+        self.categories: Dict[str, Dict[str, float]] = {}
+
+    def rebuild(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        with self._lock:
+            self.reset()
+            for code, item in items:
+                self._add(code, item)
+
+    def apply(self, item_code: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        with self._lock:
+            if before is not None:
+                self._remove(item_code, before)
+            if after is not None:
+                self._add(item_code, after)
+
+    def _add(self, code, item):
+        value = item['quantity'] * item['price']
+        self.item_count += 1
+        self.total_quantity += item['quantity']
+        self.total_value += value
+        stats = self.categories.setdefault(item['category'], {'items': 0, 'value': 0.0, 'quantity': 0})
+        stats['items'] += 1
+        stats['quantity'] += item['quantity']
+        stats['value'] += value
+
+    def _remove(self, code, item):
+        value = item['quantity'] * item['price']
+        self.item_count -= 1
+        self.total_quantity -= item['quantity']
+        self.total_value -= value
+        stats = self.categories[item['category']]
+        stats['items'] -= 1
+        stats['quantity'] -= item['quantity']
+        stats['value'] -= value
+        if stats['items'] == 0:
+            del self.categories[item['category']]
+
+    def category_stats(self, category: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Copy of the per category counters, optionally only the categories matching (case insensitive)"""
+        with self._lock:
+            return {cat: dict(stats) for cat, stats in self.categories.items()
+                    if category is None or cat.lower() == category.lower()}
+
+
+class GroupTotals:
+    """
+    Running counters per value of an item field (e.g. per supplier): items, units, stock value
+    and the number of items needing a reorder (LOW or CRITICAL), updated in O(1) per mutation.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.groups: Dict[str, Dict[str, float]] = {}
+
+    def rebuild(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        with self._lock:
+            self.reset()
+            for _, item in items:
+                self._add(item, 1)
+
+    def apply(self, item_code: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        with self._lock:
+            if before is not None:
+                self._add(before, -1)
+            if after is not None:
+                self._add(after, 1)
+
+    def _add(self, item, sign):
+        stats = self.groups.setdefault(item[self.field], {'items': 0, 'quantity': 0, 'value': 0.0, 'reorder': 0})
+        stats['items'] += sign
+        stats['quantity'] += sign * item['quantity']
+        stats['value'] += sign * item['quantity'] * item['price']
+        if stock_status(item['quantity'], item['min_threshold']) != "GOOD":
+            stats['reorder'] += sign
+        if stats['items'] == 0:
+            del self.groups[item[self.field]]
+
+    def get(self, value: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            stats = self.groups.get(value)
+            return dict(stats) if stats is not None else None
+
+
+class LowStockIndex:
+    """
+    Items below twice their minimum threshold, kept sorted by (quantity / min_threshold, item_code).
+    CRITICAL items are a prefix of the list and LOW items the rest, so the most critical items,
+    the count per status and any page of alerts are found with a binary search: O(log n + k).
+    Listeners subscribed to the index are called with (item_code, old_status, new_status, item)
+    whenever an item moves between GOOD, LOW and CRITICAL.
+    """
+
+    # largest key of a CRITICAL item
+    CRITICAL_BOUND = (1.0, chr(0x10FFFF))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, str, str, Dict[str, Any]], None]] = []
+        self.reset()
+
+    def reset(self):
+        self._entries: List[Tuple[float, str]] = []
+        self._keys: Dict[str, Tuple[float, str]] = {}
+
+    def subscribe(self, listener: Callable[[str, str, str, Dict[str, Any]], None]):
+        self._listeners.append(listener)
+
+    def rebuild(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        with self._lock:
+            self.reset()
+            for code, item in items:
+                if stock_status(item['quantity'], item['min_threshold']) != "GOOD":
+                    key = (stock_ratio(item['quantity'], item['min_threshold']), code)
+                    self._keys[code] = key
+                    self._entries.append(key)
+            self._entries.sort()
+
+    def apply(self, item_code: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        old_status = stock_status(before['quantity'], before['min_threshold']) if before else "GOOD"
+        new_status = stock_status(after['quantity'], after['min_threshold']) if after else "GOOD"
+        with self._lock:
+            old_key = self._keys.pop(item_code, None)
+            if old_key is not None:
+                del self._entries[bisect.bisect_left(self._entries, old_key)]
+            if new_status != "GOOD":
+                key = (stock_ratio(after['quantity'], after['min_threshold']), item_code)
+                self._keys[item_code] = key
+                bisect.insort(self._entries, key)
+        if old_status != new_status and after is not None:
+            for listener in self._listeners:
+                listener(item_code, old_status, new_status, after)
+
+    def _bounds(self, status: Optional[str]) -> Tuple[int, int]:
+        split = bisect.bisect_right(self._entries, self.CRITICAL_BOUND)
+        if status == "CRITICAL":
+            return 0, split
+        if status == "LOW":
+            return split, len(self._entries)
+        return 0, len(self._entries)
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            start, stop = self._bounds(status)
+            return stop - start
+
+    def page(self, status: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Item codes from the most critical one, optionally only one status"""
+        with self._lock:
+            start, stop = self._bounds(status)
+            start = min(start + offset, stop)
+            if limit is not None:
+                stop = min(stop, start + limit)
+            return [code for _, code in self._entries[start:stop]]
+
+    def top(self, n: int) -> List[str]:
+        """The n most critical item codes"""
+        return self.page(limit=n)
+
+    def iter_entries(self, status: Optional[str] = None,
+                     after: Optional[Tuple[float, str]] = None) -> Iterator[Tuple[float, str]]:
+        """(ratio, item_code) keys from the most critical one, resuming after the key `after` (a cursor)"""
+        while True:
+            with self._lock:
+                start, stop = self._bounds(status)
+                if after is not None:
+                    start = max(start, bisect.bisect_right(self._entries, after))
+                chunk = self._entries[start:min(stop, start + CHUNK_SIZE)]
+            if not chunk:
+                return
+            yield from chunk
+            after = chunk[-1]
+
+
+class AttributeIndex:
+    """
+    Item field value -> sorted item codes, e.g. supplier -> the items it provides.
+    The distinct values are kept sorted as well, so the listings and their cursors are binary searches.
+    With casefold the values are indexed lower case (case insensitive lookups, values() returns them lower case).
+    """
+
+    def __init__(self, field: str, casefold: bool = False):
+        self.field = field
+        self.casefold = casefold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._codes: Dict[str, List[str]] = {}
+        self._values: List[str] = []
+
+    def _key(self, item: Optional[Dict[str, Any]]) -> Optional[str]:
+        if item is None:
+            return None
+        return item[self.field].lower() if self.casefold else item[self.field]
+
+    def rebuild(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        with self._lock:
+            self.reset()
+            for code, item in items:
+                self._codes.setdefault(self._key(item), []).append(code)
+            for codes in self._codes.values():
+                codes.sort()
+            self._values = sorted(self._codes)
+
+    def apply(self, item_code: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        old, new = self._key(before), self._key(after)
+        if old == new:
+            return
+        with self._lock:
+            if old is not None:
+                codes = self._codes[old]
+                del codes[bisect.bisect_left(codes, item_code)]
+                if not codes:
+                    del self._codes[old]
+                    del self._values[bisect.bisect_left(self._values, old)]
+            if new is not None:
+                if new not in self._codes:
+                    self._codes[new] = []
+                    bisect.insort(self._values, new)
+                bisect.insort(self._codes[new], item_code)
+
+    def count(self, value: str) -> int:
+        with self._lock:
+            return len(self._codes.get(value.lower() if self.casefold else value, ()))
+
+    def values(self, after: Optional[str] = None) -> Iterator[str]:
+        """Distinct values in sorted order, resuming after `after`"""
+        while True:
+            with self._lock:
+                start = 0 if after is None else bisect.bisect_right(self._values, after)
+                chunk = self._values[start:start + CHUNK_SIZE]
+            if not chunk:
+                return
+            yield from chunk
+            after = chunk[-1]
+
+    def codes(self, value: str, after: Optional[str] = None) -> Iterator[str]:
+        """Item codes having the value, in sorted order, resuming after the item code `after`"""
+        value = value.lower() if self.casefold else value
+        while True:
+            with self._lock:
+                codes = self._codes.get(value, [])
+                start = 0 if after is None else bisect.bisect_right(codes, after)
+                chunk = codes[start:start + CHUNK_SIZE]
+            if not chunk:
+                return
+            yield from chunk
+            after = chunk[-1]
+
+
+def check_aggregates(aggregates: InventoryAggregates, low_stock_index: LowStockIndex,
+                     items: Iterable[Tuple[str, Dict[str, Any]]],
+                     attribute_indexes: Iterable[AttributeIndex] = (),
+                     group_totals: Iterable[GroupTotals] = ()) -> List[str]:
+    """Compare the running aggregates and the indexes against a full rescan, returns the mismatches"""
+    items = list(items)
+    expected = InventoryAggregates()
+    expected.rebuild(items)
+    expected_index = LowStockIndex()
+    expected_index.rebuild(items)
+    errors = []
+
+    def close(a, b):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+    for name in ("item_count", "total_quantity", "total_value"):
+        if not close(getattr(aggregates, name), getattr(expected, name)):
+            errors.append(f"{name}: {getattr(aggregates, name)} != {getattr(expected, name)}")
+    actual_categories = aggregates.category_stats()
+    if set(actual_categories) != set(expected.categories):
+        errors.append(f"categories: {sorted(actual_categories)} != {sorted(expected.categories)}")
+    for cat, stats in expected.categories.items():
+        for key, value in stats.items():
+            actual = actual_categories.get(cat, {}).get(key, 0)
+            if not close(actual, value):
+                errors.append(f"{cat}.{key}: {actual} != {value}")
+    for status in ("CRITICAL", "LOW"):
+        actual, wanted = low_stock_index.page(status), expected_index.page(status)
+        if actual != wanted:
+            errors.append(f"{status}: {actual} != {wanted}")
+    for index in attribute_indexes:
+        expected_index = AttributeIndex(index.field, index.casefold)
+        expected_index.rebuild(items)
+        for value in expected_index.values():
+            actual, wanted = list(index.codes(value)), list(expected_index.codes(value))
+            if actual != wanted:
+                errors.append(f"{index.field} {value}: {actual} != {wanted}")
+        if list(index.values()) != list(expected_index.values()):
+            errors.append(f"{index.field} values: {list(index.values())} != {list(expected_index.values())}")
+    for totals in group_totals:
+        expected_totals = GroupTotals(totals.field)
+        expected_totals.rebuild(items)
+        if set(totals.groups) != set(expected_totals.groups):
+            errors.append(f"{totals.field} groups: {sorted(totals.groups)} != {sorted(expected_totals.groups)}")
+        for value, stats in expected_totals.groups.items():
+            for key, expected in stats.items():
+                actual = (totals.get(value) or {}).get(key, 0)
+                if not close(actual, expected):
+                    errors.append(f"{totals.field} {value}.{key}: {actual} != {expected}")
+    return errors
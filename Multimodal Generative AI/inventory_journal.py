@@ -0,0 +1,231 @@
+"""
+Write-ahead journal and snapshots of the in-memory inventory.
+
+Every mutation of the MemoryInventoryStore is appended to the journal as one JSON line
+(create / move records, numbered by seq). Appends only fill a buffer and wake a flusher thread,
+which writes and fsyncs the whole buffer at once (group commit): a lone mutation is fsynced right away,
+the ones arriving while an fsync is in flight share the next one. Each caller waits for the fsync
+covering its record before it returns. fsync_interval > 0 additionally holds the flusher that long
+after the first append of a group, trading latency for fewer fsyncs.
+
+The journal is split into segments (journal-<first seq>.log). A snapshot copies the whole state
+at a segment boundary into snapshot-<seq>/ (items, suppliers and the item -> column folder map in meta.json,
+transactions as .npy columns),
+after which the older segments and snapshots are deleted. Recovery loads the last snapshot and
+replays the segments after it, a torn line at the end of a segment (crash mid-write) ends that segment.
+
+A failed write or fsync fails the journal for good (the lines may be half written and a failed fsync
+can't be retried safely): the callers waiting for it and every later append raise JournalError,
+so no mutation is acknowledged past the failure. The store has to be reopened, recovery then
+restores the last durable state.
+"""
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import contextlib
+import threading
+import logging
+import shutil
+import json
+import os
+
+from transaction_log import TransactionLog, fsync_dir
+
+logger = logging.getLogger("inventory_journal")
+
+SEGMENT_PREFIX, SEGMENT_SUFFIX = "journal-", ".log"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+class JournalError(OSError):
+    """The journal failed to write or fsync, nothing past the last durable seq is acknowledged"""
+
+
+def _numbered(folder: str, prefix: str, suffix: str = "") -> List[Tuple[int, str]]:
+    """(number, path) of the files / folders named <prefix><number><suffix>, in number order"""
+    found = []
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):len(name) - len(suffix)]
+            if number.isdigit():
+                found.append((int(number), os.path.join(folder, name)))
+    return sorted(found)
+
+
+def read_journal(folder: str, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+    """Records with a seq greater than after_seq, in seq order"""
+    if not os.path.isdir(folder):
+        return
+    for _, path in _numbered(folder, SEGMENT_PREFIX, SEGMENT_SUFFIX):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Torn journal record at the end of {path}, ignored")
+                    break
+                if record["seq"] > after_seq:
+                    yield record
+
+
+class Journal:
+    """Append only journal with group commit, see the module docstring"""
+
+    def __init__(self, folder: str, last_seq: int = 0, fsync_interval: float = 0):
+        self.folder = folder
+        self.fsync_interval = fsync_interval
+        os.makedirs(folder, exist_ok=True)
+        # _lock guards the buffer and the counters, _io_lock the file (one writer at a time)
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._pending = threading.Condition(self._lock)
+        self._buffer: List[str] = []
+        # the write error that failed the journal, see the module docstring
+        self._failure: Optional[OSError] = None
+        self.last_seq = last_seq
+        self.durable_seq = last_seq
+        self.fsync_count = 0
+        # always a fresh segment, never append after a possibly torn tail
+        self._file = self._open_segment(last_seq + 1)
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _open_segment(self, first_seq: int):
+        path = os.path.join(self.folder, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        return open(path, "a", encoding="utf-8")
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Buffer the record, returns its seq. It is durable once wait(seq) returns, JournalError once failed"""
+        with self._lock:
+            self._check()
+            self.last_seq += 1
+            seq = self.last_seq
+            self._buffer.append(json.dumps({"seq": seq, **record}, separators=(",", ":")) + "\n")
+            self._pending.notify()
+        return seq
+
+    def wait(self, seq: int):
+        with self._synced:
+            while self.durable_seq < seq:
+                self._check()
+                self._synced.wait()
+
+    def _check(self):
+        """Raise JournalError once the journal failed, the caller holds _lock"""
+        if self._failure is not None:
+            raise JournalError(f"Journal write failed, nothing is journaled past seq {self.durable_seq}") \
+                from self._failure
+
+    def _write(self):
+        """Write and fsync the buffer, the caller holds _io_lock"""
+        with self._lock:
+            self._check()
+            lines, self._buffer = self._buffer, []
+            seq = self.last_seq
+        if lines:
+            try:
+                self._file.write("".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                # the waiters of these lines raise, and so do all the later appends
+                with self._synced:
+                    self._failure = e
+                    self._synced.notify_all()
+                    self._check()
+            self.fsync_count += 1
+        with self._synced:
+            self.durable_seq = max(self.durable_seq, seq)
+            self._synced.notify_all()
+
+    def sync(self):
+        with self._io_lock:
+            self._write()
+
+    def _flush_loop(self):
+        while True:
+            with self._pending:
+                while not self._buffer and not self._closed.is_set():
+                    self._pending.wait()
+                if not self._buffer:
+                    return
+            if self.fsync_interval > 0:
+                self._closed.wait(self.fsync_interval)
+            try:
+                self.sync()
+            except JournalError:
+                logger.exception("Journal write failed, the journal accepts no more records")
+                return
+
+    def rotate(self) -> int:
+        """Sync and start a new segment, returns the last seq of the closed one"""
+        with self._io_lock:
+            self._write()
+            self._file.close()
+            self._file = self._open_segment(self.last_seq + 1)
+            return self.last_seq
+
+    def drop_segments(self, upto_seq: int):
+        """Delete the segments holding only records up to upto_seq (covered by a snapshot)"""
+        segments = _numbered(self.folder, SEGMENT_PREFIX, SEGMENT_SUFFIX)
+        for (first, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= upto_seq:
+                os.remove(path)
+
+    def close(self):
+        with self._pending:
+            self._closed.set()
+            self._pending.notify()
+        self._flusher.join()
+        with self._io_lock:
+            try:
+                self._write()
+            except JournalError:
+                logger.warning("Journal closed after a write failure, the unwritten records are dropped")
+                with contextlib.suppress(OSError):
+                    self._file.close()
+                return
+            self._file.close()
+
+
+def write_snapshot(folder: str, seq: int, items: Dict[str, Dict[str, Any]], transactions: TransactionLog,
+                   suppliers: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Write the state as of seq into snapshot-<seq>/ (built aside, fsynced, then renamed), then drop the older
+    snapshots. Everything is durable when it returns
+    """
+    tmp = os.path.join(folder, f".tmp-{SNAPSHOT_PREFIX}{seq:012d}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    folders = transactions.save(os.path.join(tmp, "transactions"))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"seq": seq, "items": items, "suppliers": suppliers or {}, "transaction_folders": folders}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    # the columns and meta.json are fsynced, then the folder entries and the rename:
+    # the caller drops the journal segments the snapshot covers as soon as this returns
+    fsync_dir(tmp)
+    target = os.path.join(folder, f"{SNAPSHOT_PREFIX}{seq:012d}")
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    fsync_dir(folder)
+    for older, path in _numbered(folder, SNAPSHOT_PREFIX):
+        if older < seq:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(folder: str) -> Optional[Tuple[int, Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]], TransactionLog]]:
+    """(seq, items, suppliers, transactions) of the last snapshot, None when there is none"""
+    if not os.path.isdir(folder):
+        return None
+    snapshots = _numbered(folder, SNAPSHOT_PREFIX)
+    if not snapshots:
+        return None
+    seq, path = snapshots[-1]
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if "transaction_folders" not in meta:
+        raise ValueError(f"Snapshot {path} has no transaction folder map")
+    # memory mapped, the columns are copied on the first append of an item
+    transactions = TransactionLog.load(os.path.join(path, "transactions"), meta["transaction_folders"], mmap=True)
+    return seq, meta["items"], meta.get("suppliers", {}), transactions
@@ -0,0 +1,724 @@
+"""
+Storage engines for the InventoryManager MCP server.
+
+Both engines expose the same InventoryStore interface, the server tools only talk to it:
+  - MemoryInventoryStore: the original module level dict, nothing survives a restart
+  - SQLiteInventoryStore: persistent SQLite database in WAL mode
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import threading
+import logging
+import sqlite3
+
+from transaction_log import TransactionLog, to_day
+from inventory_journal import Journal, JournalError, read_journal, write_snapshot, load_snapshot
+
+from inventory_indexes import InventoryAggregates, LowStockIndex, AttributeIndex, GroupTotals, check_aggregates
+
+logger = logging.getLogger("inventory_store")
+
+
+class InventoryError(Exception):
+    """Base error of the inventory stores"""
+
+
+class ItemNotFoundError(InventoryError, KeyError):
+    def __init__(self, item_code: str):
+        super().__init__(item_code)
+        self.item_code = item_code
+
+
+class ItemExistsError(InventoryError):
+    def __init__(self, item_code: str):
+        super().__init__(item_code)
+        self.item_code = item_code
+
+
+class InsufficientStockError(InventoryError):
+    def __init__(self, item_code: str, available: int, requested: int):
+        super().__init__(item_code)
+        self.item_code = item_code
+        self.available = available
+        self.requested = requested
+
+
+ITEM_FIELDS = ("name", "category", "quantity", "min_threshold", "price", "supplier", "last_updated")
+SUPPLIER_FIELDS = ("contact", "lead_time_days")
+
+
+class InventoryStore(ABC):
+    """
+    Storage interface used by the inventory tools.
+    Every engine reports its mutations to _changed() while the item is still locked,
+    which keeps the derived aggregates and indexes in step with the stored data.
+    """
+
+    def __init__(self):
+        self.aggregates = InventoryAggregates()
+        self.low_stock_index = LowStockIndex()
+        # sorted item codes per category (case insensitive) and per supplier
+        self.category_index = AttributeIndex("category", casefold=True)
+        self.supplier_index = AttributeIndex("supplier")
+        # supplier -> items, units, stock value and items to reorder
+        self.supplier_totals = GroupTotals("supplier")
+
+    def _rebuild_indexes(self):
+        items = list(self.items())
+        self.aggregates.rebuild(items)
+        self.low_stock_index.rebuild(items)
+        self.category_index.rebuild(items)
+        self.supplier_index.rebuild(items)
+        self.supplier_totals.rebuild(items)
+
+    def _changed(self, item_code: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        self.aggregates.apply(item_code, before, after)
+        self.low_stock_index.apply(item_code, before, after)
+        self.category_index.apply(item_code, before, after)
+        self.supplier_index.apply(item_code, before, after)
+        self.supplier_totals.apply(item_code, before, after)
+
+    def check_indexes(self) -> List[str]:
+        """Compare the derived aggregates and indexes against a full rescan of the items"""
+        return check_aggregates(self.aggregates, self.low_stock_index, self.items(),
+                                (self.category_index, self.supplier_index), (self.supplier_totals,))
+
+    @abstractmethod
+    def get_item(self, item_code: str) -> Optional[Dict[str, Any]]:
+        """Item fields (without transactions) or None"""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over (item_code, item fields)"""
+
+    @abstractmethod
+    def items_by_category(self, category: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Items of a category, case insensitive"""
+
+    @abstractmethod
+    def create_item(self, item_code: str, item: Dict[str, Any], transaction: Optional[Dict[str, Any]] = None):
+        """Insert a new item and its optional initial transaction, raises ItemExistsError"""
+
+    @abstractmethod
+    def add_stock(self, item_code: str, quantity: int, unit_cost: float, date: str) -> Tuple[int, int]:
+        """Increase the quantity and record a purchase, returns (old quantity, new quantity)"""
+
+    @abstractmethod
+    def remove_stock(self, item_code: str, quantity: int, unit_price: float, date: str) -> Tuple[int, int]:
+        """Decrease the quantity and record a sale, raises InsufficientStockError"""
+
+    @abstractmethod
+    def create_items(self, entries: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]):
+        """Insert (item_code, item, initial transaction) entries, all or none, raises ItemExistsError"""
+
+    @abstractmethod
+    def apply_movements(self, movements: List[Dict[str, Any]], date: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Apply stock movements {item_code, type: purchase|sale, quantity, unit_cost|unit_price} in order,
+        all or none: raises ItemNotFoundError or InsufficientStockError before anything is changed.
+        Returns item_code -> (quantity before, quantity after) of every item touched.
+        """
+
+    @abstractmethod
+    def get_supplier(self, name: str) -> Optional[Dict[str, Any]]:
+        """Supplier record {contact, lead_time_days}, None for an unknown supplier"""
+
+    @abstractmethod
+    def suppliers(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every supplier record, in name order"""
+
+    @abstractmethod
+    def put_supplier(self, name: str, supplier: Dict[str, Any]):
+        """Create or replace a supplier record"""
+
+    def get_items(self, item_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fields of the existing items among item_codes"""
+        found = {}
+        for code in item_codes:
+            item = self.get_item(code)
+            if item is not None:
+                found[code] = item
+        return found
+
+    @abstractmethod
+    def transactions(self, item_code: str) -> List[Dict[str, Any]]:
+        """Transactions of an item in insertion order"""
+
+    @abstractmethod
+    def transaction_count(self, item_code: str) -> int:
+        """Number of transactions of an item"""
+
+    @abstractmethod
+    def recent_transactions(self, item_code: str, limit: int) -> List[Dict[str, Any]]:
+        """The limit most recent transactions of an item, newest first"""
+
+    @abstractmethod
+    def financials(self, item_code: str, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> Dict[str, float]:
+        """
+        units_sold, revenue, units_purchased, purchase_cost and cogs of an item between two
+        ISO dates (inclusive). COGS values the units sold at the average purchase cost up to end_date.
+        """
+
+    def __contains__(self, item_code: str) -> bool:
+        return self.get_item(item_code) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def close(self):
+        """Release the resources of the engine (threads, files)"""
+
+
+def plan_movements(quantities: Dict[str, int], movements: List[Dict[str, Any]]) -> Dict[str, Tuple[int, int]]:
+    """
+    Replay the movements over the current quantities, raising on the first unknown item or
+    sale that would drive a quantity negative. Returns item_code -> (before, after)
+    """
+    running = dict(quantities)
+    for movement in movements:
+        code = movement['item_code']
+        if code not in running:
+            raise ItemNotFoundError(code)
+        delta = movement['quantity'] if movement['type'] == 'purchase' else -movement['quantity']
+        if running[code] + delta < 0:
+            raise InsufficientStockError(code, running[code], movement['quantity'])
+        running[code] += delta
+    return {code: (quantities[code], running[code]) for code in running}
+
+
+class MemoryInventoryStore(InventoryStore):
+    """
+    The inventory as a dict of items, the transactions live in a columnar TransactionLog.
+    Every item has its own lock: the check and update of a stock movement happen under it,
+    so concurrent movements on the same item are serialized while different items proceed in parallel.
+
+    With a journal_dir the store is crash safe: the mutations are journaled under the item locks
+    (so the journal keeps the per item order) and acknowledged once their group commit is fsynced,
+    snapshots are taken every snapshot_interval seconds and the state is recovered on startup
+    (the seed is only used when the folder holds no snapshot yet).
+    After a journal write failure the mutations raise JournalError and are not acknowledged,
+    the ones already applied in memory are lost on restart (the store is to be reopened).
+    """
+
+    def __init__(self, inventory: Optional[Dict[str, Dict[str, Any]]] = None, journal_dir: Optional[str] = None,
+                 fsync_interval: float = 0, snapshot_interval: float = 300,
+                 suppliers: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        # the seed is copied, the caller's dicts (e.g. the server's seed) are never modified
+        self._inventory = {code: self._fields(item) for code, item in (inventory or {}).items()}
+        self._suppliers = {name: {field: supplier[field] for field in SUPPLIER_FIELDS}
+                           for name, supplier in (suppliers or {}).items()}
+        self._transactions = TransactionLog()
+        snapshot = load_snapshot(journal_dir) if journal_dir else None
+        if snapshot:
+            self._snapshot_seq, self._inventory, self._suppliers, self._transactions = snapshot
+        else:
+            self._snapshot_seq = 0
+            for code, item in (inventory or {}).items():
+                self._transactions.item(code)
+                for transaction in item.get('transactions', []):
+                    self._transactions.append(code, transaction)
+        self._locks = {code: threading.Lock() for code in self._inventory}
+        # guards the item registry (new items and their locks)
+        self._registry_lock = threading.Lock()
+
+        self.journal_dir = journal_dir
+        self._journal = None
+        self._closed = threading.Event()
+        if journal_dir:
+            last_seq = self._snapshot_seq
+            for record in read_journal(journal_dir, after_seq=self._snapshot_seq):
+                self._replay(record)
+                last_seq = record['seq']
+            self._journal = Journal(journal_dir, last_seq=last_seq, fsync_interval=fsync_interval)
+            self._snapshot_lock = threading.Lock()
+            if not snapshot:
+                self.snapshot()
+            if snapshot_interval > 0:
+                threading.Thread(target=self._snapshot_loop, args=(snapshot_interval,),
+                                 name="inventory-snapshots", daemon=True).start()
+        self._rebuild_indexes()
+
+    @staticmethod
+    def _fields(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: item[field] for field in ITEM_FIELDS}
+
+    def _item(self, item_code: str) -> Dict[str, Any]:
+        item = self._inventory.get(item_code)
+        if item is None:
+            raise ItemNotFoundError(item_code)
+        return item
+
+    def _log(self, record: Dict[str, Any]) -> Optional[int]:
+        """Journal a mutation (the caller holds the locks of its items), returns the seq to wait for"""
+        return self._journal.append(record) if self._journal else None
+
+    def _durable(self, seq: Optional[int]):
+        """Wait for the group commit of a journaled mutation, outside of the item locks"""
+        if seq is not None:
+            self._journal.wait(seq)
+
+    def _replay(self, record: Dict[str, Any]):
+        """Apply a journal record, it was validated when it was first applied"""
+        if record['op'] == 'create':
+            for code, item, transaction in record['items']:
+                self._inventory[code] = self._fields(item)
+                self._locks[code] = threading.Lock()
+                self._transactions.item(code)
+                if transaction:
+                    self._transactions.append(code, transaction)
+        elif record['op'] == 'supplier':
+            self._suppliers[record['name']] = record['supplier']
+        elif record['op'] == 'move':
+            for movement in record['movements']:
+                item = self._inventory[movement['item_code']]
+                item['quantity'] += movement['quantity'] if movement['type'] == 'purchase' else -movement['quantity']
+                item['last_updated'] = record['date']
+                self._transactions.append(movement['item_code'], {**movement, "date": record['date']})
+
+    def snapshot(self) -> Optional[int]:
+        """Write a snapshot of the whole state and drop the journal it covers, returns its seq"""
+        if self._journal is None:
+            return None
+        with self._snapshot_lock:
+            # all the writers are paused while the state is copied, the disk writes happen after
+            with self._registry_lock:
+                locks = [self._locks[code] for code in sorted(self._locks)]
+                for lock in locks:
+                    lock.acquire()
+                try:
+                    seq = self._journal.rotate()
+                    items = {code: self._fields(item) for code, item in self._inventory.items()}
+                    suppliers = {name: dict(supplier) for name, supplier in self._suppliers.items()}
+                    transactions = self._transactions.copy()
+                finally:
+                    for lock in reversed(locks):
+                        lock.release()
+            write_snapshot(self.journal_dir, seq, items, transactions, suppliers)
+            self._journal.drop_segments(seq)
+            self._snapshot_seq = seq
+            return seq
+
+    def _snapshot_loop(self, interval: float):
+        while not self._closed.wait(interval):
+            if self._journal.last_seq > self._snapshot_seq:
+                try:
+                    self.snapshot()
+                except JournalError:
+                    logger.exception("Snapshot skipped, the journal failed")
+                    return
+
+    def close(self):
+        self._closed.set()
+        if self._journal is not None:
+            self._journal.close()
+
+    def get_item(self, item_code):
+        item = self._inventory.get(item_code)
+        if item is None:
+            return None
+        with self._locks[item_code]:
+            return self._fields(item)
+
+    def _registered(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """The items at this point, taken under the registry lock so a concurrent create can't resize the dict"""
+        with self._registry_lock:
+            return list(self._inventory.items())
+
+    def items(self):
+        for code, item in self._registered():
+            with self._locks[code]:
+                fields = self._fields(item)
+            yield code, fields
+
+    def items_by_category(self, category):
+        category = category.lower()
+        found = []
+        for code, item in self._registered():
+            with self._locks[code]:
+                if item['category'].lower() == category:
+                    found.append((code, self._fields(item)))
+        return found
+
+    def get_supplier(self, name):
+        supplier = self._suppliers.get(name)
+        return dict(supplier) if supplier is not None else None
+
+    def suppliers(self):
+        for name in sorted(self._suppliers):
+            yield name, dict(self._suppliers[name])
+
+    def put_supplier(self, name, supplier):
+        supplier = {field: supplier[field] for field in SUPPLIER_FIELDS}
+        with self._registry_lock:
+            seq = self._log({"op": "supplier", "name": name, "supplier": supplier})
+            self._suppliers[name] = supplier
+        self._durable(seq)
+
+    def create_item(self, item_code, item, transaction=None):
+        self.create_items([(item_code, item, transaction)])
+
+    def create_items(self, entries):
+        with self._registry_lock:
+            codes = [code for code, _, _ in entries]
+            for code in codes:
+                if code in self._inventory or codes.count(code) > 1:
+                    raise ItemExistsError(code)
+            seq = self._log({"op": "create", "items": [[code, self._fields(item), transaction]
+                                                       for code, item, transaction in entries]})
+            for code, item, transaction in entries:
+                # the item is published with its lock held, movements wait for the indexes to know it
+                lock = threading.Lock()
+                with lock:
+                    self._locks[code] = lock
+                    self._transactions.item(code)
+                    if transaction:
+                        self._transactions.append(code, transaction)
+                    self._inventory[code] = self._fields(item)
+                    self._changed(code, None, self._fields(item))
+        self._durable(seq)
+
+    def apply_movements(self, movements, date):
+        codes = sorted({movement['item_code'] for movement in movements})
+        for code in codes:
+            self._item(code)
+        # locks taken in item code order, two batches never wait on each other in a cycle
+        locks = [self._locks[code] for code in codes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            before = {code: self._fields(self._inventory[code]) for code in codes}
+            changes = plan_movements({code: item['quantity'] for code, item in before.items()}, movements)
+            seq = self._log({"op": "move", "date": date, "movements": movements})
+            for movement in movements:
+                self._transactions.append(movement['item_code'], {**movement, "date": date})
+            for code, (_, quantity) in changes.items():
+                item = self._inventory[code]
+                item['quantity'] = quantity
+                item['last_updated'] = date
+                self._changed(code, before[code], self._fields(item))
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        self._durable(seq)
+        return changes
+
+    def add_stock(self, item_code, quantity, unit_cost, date):
+        item = self._item(item_code)
+        movement = {"item_code": item_code, "type": "purchase", "quantity": quantity, "unit_cost": unit_cost}
+        with self._locks[item_code]:
+            before = self._fields(item)
+            seq = self._log({"op": "move", "date": date, "movements": [movement]})
+            item['quantity'] += quantity
+            item['last_updated'] = date
+            self._transactions.append(item_code, {"date": date, "type": "purchase", "quantity": quantity, "unit_cost": unit_cost})
+            self._changed(item_code, before, self._fields(item))
+        self._durable(seq)
+        return before['quantity'], before['quantity'] + quantity
+
+    def remove_stock(self, item_code, quantity, unit_price, date):
+        item = self._item(item_code)
+        movement = {"item_code": item_code, "type": "sale", "quantity": quantity, "unit_price": unit_price}
+        with self._locks[item_code]:
+            if item['quantity'] < quantity:
+                raise InsufficientStockError(item_code, item['quantity'], quantity)
+            before = self._fields(item)
+            seq = self._log({"op": "move", "date": date, "movements": [movement]})
+            item['quantity'] -= quantity
+            item['last_updated'] = date
+            self._transactions.append(item_code, {"date": date, "type": "sale", "quantity": quantity, "unit_price": unit_price})
+            self._changed(item_code, before, self._fields(item))
+        self._durable(seq)
+        return before['quantity'], before['quantity'] - quantity
+
+    def transactions(self, item_code):
+        self._item(item_code)
+        with self._locks[item_code]:
+            return self._transactions.item(item_code).all()
+
+    def transaction_count(self, item_code):
+        self._item(item_code)
+        return len(self._transactions.item(item_code))
+
+    def recent_transactions(self, item_code, limit):
+        self._item(item_code)
+        with self._locks[item_code]:
+            return self._transactions.item(item_code).recent(limit)
+
+    def financials(self, item_code, start_date=None, end_date=None):
+        self._item(item_code)
+        with self._locks[item_code]:
+            return self._transactions.item(item_code).financials(
+                to_day(start_date) if start_date else None, to_day(end_date) if end_date else None)
+
+    def __contains__(self, item_code):
+        return item_code in self._inventory
+
+    def __len__(self):
+        return len(self._inventory)
+
+
+class SQLiteInventoryStore(InventoryStore):
+    """
+    SQLite engine in WAL mode (readers never block the writer).
+    Every thread gets its own connection, sqlite3 keeps the compiled statements of each
+    connection in its statement cache so the constant SQL below is prepared only once.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            item_code     TEXT PRIMARY KEY,
+            name          TEXT NOT NULL,
+            category      TEXT NOT NULL,
+            quantity      INTEGER NOT NULL,
+            min_threshold INTEGER NOT NULL,
+            price         REAL NOT NULL,
+            supplier      TEXT NOT NULL,
+            last_updated  TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_code  TEXT NOT NULL REFERENCES items (item_code),
+            date       TEXT NOT NULL,
+            type       TEXT NOT NULL,
+            quantity   INTEGER NOT NULL,
+            unit_cost  REAL,
+            unit_price REAL
+        );
+        CREATE TABLE IF NOT EXISTS suppliers (
+            name           TEXT PRIMARY KEY,
+            contact        TEXT,
+            lead_time_days INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_items_category ON items (category COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_items_supplier ON items (supplier);
+        CREATE INDEX IF NOT EXISTS idx_transactions_item_date ON transactions (item_code, date);
+    """
+
+    SELECT_ITEM = ("SELECT item_code, name, category, quantity, min_threshold, price, supplier, last_updated "
+                   "FROM items WHERE item_code = ?")
+    SELECT_ITEMS = ("SELECT item_code, name, category, quantity, min_threshold, price, supplier, last_updated "
+                    "FROM items ORDER BY rowid")
+    SELECT_CATEGORY = ("SELECT item_code, name, category, quantity, min_threshold, price, supplier, last_updated "
+                       "FROM items WHERE category = ? COLLATE NOCASE ORDER BY rowid")
+    SELECT_MANY = ("SELECT item_code, name, category, quantity, min_threshold, price, supplier, last_updated "
+                   "FROM items WHERE item_code IN ({placeholders})")
+    INSERT_ITEM = ("INSERT INTO items (item_code, name, category, quantity, min_threshold, price, supplier, last_updated) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    INSERT_TRANSACTION = ("INSERT INTO transactions (item_code, date, type, quantity, unit_cost, unit_price) "
+                          "VALUES (?, ?, ?, ?, ?, ?)")
+    SELECT_TRANSACTIONS = ("SELECT date, type, quantity, unit_cost, unit_price FROM transactions "
+                           "WHERE item_code = ? ORDER BY id")
+    COUNT_TRANSACTIONS = "SELECT COUNT(*) FROM transactions WHERE item_code = ?"
+    # walks the (item_code, date) index backwards, no sort
+    SELECT_RECENT = ("SELECT date, type, quantity, unit_cost, unit_price FROM transactions "
+                     "WHERE item_code = ? ORDER BY date DESC, id DESC LIMIT ?")
+    SELECT_FINANCIALS = ("SELECT "
+                         " COALESCE(SUM(CASE WHEN type = 'sale' AND date >= ? THEN quantity END), 0),"
+                         " COALESCE(SUM(CASE WHEN type = 'sale' AND date >= ? THEN quantity * unit_price END), 0),"
+                         " COALESCE(SUM(CASE WHEN type = 'purchase' AND date >= ? THEN quantity END), 0),"
+                         " COALESCE(SUM(CASE WHEN type = 'purchase' AND date >= ? THEN quantity * unit_cost END), 0),"
+                         " COALESCE(SUM(CASE WHEN type = 'purchase' THEN quantity END), 0),"
+                         " COALESCE(SUM(CASE WHEN type = 'purchase' THEN quantity * unit_cost END), 0) "
+                         "FROM transactions WHERE item_code = ? AND date <= ?")
+    # movements run under the write lock for their whole transaction, no compare needed
+    SET_QUANTITY = "UPDATE items SET quantity = ?, last_updated = ? WHERE item_code = ?"
+    SELECT_SUPPLIER = "SELECT contact, lead_time_days FROM suppliers WHERE name = ?"
+    SELECT_SUPPLIERS = "SELECT name, contact, lead_time_days FROM suppliers ORDER BY name"
+    UPSERT_SUPPLIER = "INSERT OR REPLACE INTO suppliers (name, contact, lead_time_days) VALUES (?, ?, ?)"
+
+    def __init__(self, path: str = "inventory.db", seed: Optional[Dict[str, Dict[str, Any]]] = None,
+                 suppliers: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        if seed and conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0:
+            with conn:
+                for code, item in seed.items():
+                    conn.execute(self.INSERT_ITEM, (code, *(item[field] for field in ITEM_FIELDS)))
+                    conn.executemany(self.INSERT_TRANSACTION, [
+                        (code, t['date'], t['type'], t['quantity'], t.get('unit_cost'), t.get('unit_price'))
+                        for t in item.get('transactions', [])
+                    ])
+        if suppliers and conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()[0] == 0:
+            with conn:
+                conn.executemany(self.UPSERT_SUPPLIER, [
+                    (name, *(supplier[field] for field in SUPPLIER_FIELDS)) for name, supplier in suppliers.items()
+                ])
+        # the aggregates live in this process, they assume it is the only writer of the database
+        self._rebuild_indexes()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_item(row) -> Tuple[str, Dict[str, Any]]:
+        return row[0], dict(zip(ITEM_FIELDS, row[1:]))
+
+    @staticmethod
+    def _row_to_transaction(row) -> Dict[str, Any]:
+        date, kind, quantity, unit_cost, unit_price = row
+        transaction = {"date": date, "type": kind, "quantity": quantity}
+        if kind == "purchase":
+            transaction["unit_cost"] = unit_cost
+        else:
+            transaction["unit_price"] = unit_price
+        return transaction
+
+    def get_item(self, item_code):
+        row = self._conn().execute(self.SELECT_ITEM, (item_code,)).fetchone()
+        return self._row_to_item(row)[1] if row else None
+
+    def items(self):
+        for row in self._conn().execute(self.SELECT_ITEMS):
+            yield self._row_to_item(row)
+
+    def items_by_category(self, category):
+        return [self._row_to_item(row) for row in self._conn().execute(self.SELECT_CATEGORY, (category,))]
+
+    def get_supplier(self, name):
+        row = self._conn().execute(self.SELECT_SUPPLIER, (name,)).fetchone()
+        return dict(zip(SUPPLIER_FIELDS, row)) if row else None
+
+    def suppliers(self):
+        for row in self._conn().execute(self.SELECT_SUPPLIERS):
+            yield row[0], dict(zip(SUPPLIER_FIELDS, row[1:]))
+
+    def put_supplier(self, name, supplier):
+        with self._conn() as conn:
+            conn.execute(self.UPSERT_SUPPLIER, (name, *(supplier[field] for field in SUPPLIER_FIELDS)))
+
+    def get_items(self, item_codes):
+        found = {}
+        # stay below the SQLite host parameter limit
+        for i in range(0, len(item_codes), 500):
+            batch = item_codes[i:i + 500]
+            query = self.SELECT_MANY.format(placeholders=",".join("?" * len(batch)))
+            found.update(self._row_to_item(row) for row in self._conn().execute(query, batch))
+        return found
+
+    def create_item(self, item_code, item, transaction=None):
+        self.create_items([(item_code, item, transaction)])
+
+    def create_items(self, entries):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for code, item, transaction in entries:
+                try:
+                    conn.execute(self.INSERT_ITEM, (code, *(item[field] for field in ITEM_FIELDS)))
+                except sqlite3.IntegrityError:
+                    # leaving the block rolls back the items inserted so far
+                    raise ItemExistsError(code)
+            conn.executemany(self.INSERT_TRANSACTION, [
+                (code, t['date'], t['type'], t['quantity'], t.get('unit_cost'), t.get('unit_price'))
+                for code, _, t in entries if t
+            ])
+            for code, item, _ in entries:
+                self._changed(code, None, {field: item[field] for field in ITEM_FIELDS})
+
+    def apply_movements(self, movements, date):
+        codes = sorted({movement['item_code'] for movement in movements})
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.get_items(codes)
+            changes = plan_movements({code: item['quantity'] for code, item in before.items()}, movements)
+            conn.executemany(self.INSERT_TRANSACTION, [
+                (m['item_code'], date, m['type'], m['quantity'], m.get('unit_cost'), m.get('unit_price'))
+                for m in movements
+            ])
+            conn.executemany(self.SET_QUANTITY, [(quantity, date, code) for code, (_, quantity) in changes.items()])
+            for code, (_, quantity) in changes.items():
+                self._changed(code, before[code], {**before[code], 'quantity': quantity, 'last_updated': date})
+        return changes
+
+    def _move(self, item_code, delta, date, transaction_row):
+        conn = self._conn()
+        with conn:
+            # BEGIN IMMEDIATE takes the database write lock, no other writer can run between
+            # the read, the check and the update, which are committed together with the
+            # transaction row or not at all
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(self.SELECT_ITEM, (item_code,)).fetchone()
+            if row is None:
+                raise ItemNotFoundError(item_code)
+            before = self._row_to_item(row)[1]
+            old_quantity = before['quantity']
+            if old_quantity + delta < 0:
+                raise InsufficientStockError(item_code, old_quantity, -delta)
+            conn.execute(self.SET_QUANTITY, (old_quantity + delta, date, item_code))
+            conn.execute(self.INSERT_TRANSACTION, (item_code, date, *transaction_row))
+            # still holding the write lock, the aggregates see the movements in commit order
+            self._changed(item_code, before, {**before, 'quantity': old_quantity + delta, 'last_updated': date})
+        return old_quantity, old_quantity + delta
+
+    def add_stock(self, item_code, quantity, unit_cost, date):
+        return self._move(item_code, quantity, date, ("purchase", quantity, unit_cost, None))
+
+    def remove_stock(self, item_code, quantity, unit_price, date):
+        return self._move(item_code, -quantity, date, ("sale", quantity, None, unit_price))
+
+    def transactions(self, item_code):
+        if self.get_item(item_code) is None:
+            raise ItemNotFoundError(item_code)
+        return [self._row_to_transaction(row) for row in self._conn().execute(self.SELECT_TRANSACTIONS, (item_code,))]
+
+    def transaction_count(self, item_code):
+        if self.get_item(item_code) is None:
+            raise ItemNotFoundError(item_code)
+        return self._conn().execute(self.COUNT_TRANSACTIONS, (item_code,)).fetchone()[0]
+
+    def recent_transactions(self, item_code, limit):
+        if self.get_item(item_code) is None:
+            raise ItemNotFoundError(item_code)
+        if limit <= 0:
+            # a negative LIMIT means no limit to SQLite
+            return []
+        return [self._row_to_transaction(row) for row in self._conn().execute(self.SELECT_RECENT, (item_code, limit))]
+
+    def financials(self, item_code, start_date=None, end_date=None):
+        if self.get_item(item_code) is None:
+            raise ItemNotFoundError(item_code)
+        start, end = start_date or "", end_date or "9999-12-31"
+        units_sold, revenue, units_purchased, purchase_cost, bought_units, bought_cost = self._conn().execute(
+            self.SELECT_FINANCIALS, (start, start, start, start, item_code, end)).fetchone()
+        average_cost = bought_cost / bought_units if bought_units else 0.0
+        return {
+            "units_sold": units_sold,
+            "revenue": float(revenue),
+            "units_purchased": units_purchased,
+            "purchase_cost": float(purchase_cost),
+            "cogs": float(units_sold * average_cost),
+        }
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def open_store(backend: str = "memory", seed: Optional[Dict[str, Dict[str, Any]]] = None,
+               path: str = "inventory.db", journal_dir: Optional[str] = None,
+               fsync_interval: float = 0, snapshot_interval: float = 300,
+               suppliers: Optional[Dict[str, Dict[str, Any]]] = None) -> InventoryStore:
+    """
+    Build the storage engine selected by name ("memory" or "sqlite").
+    journal_dir makes the memory engine crash safe (write-ahead journal and snapshots in that folder).
+    suppliers seeds the supplier directory: name -> {contact, lead_time_days}.
+    """
+    if backend == "memory":
+        return MemoryInventoryStore(seed if seed is not None else {}, journal_dir=journal_dir,
+                                    fsync_interval=fsync_interval, snapshot_interval=snapshot_interval,
+                                    suppliers=suppliers)
+    if backend == "sqlite":
+        return SQLiteInventoryStore(path, seed=seed, suppliers=suppliers)
+    raise ValueError(f"Unknown inventory backend '{backend}'")
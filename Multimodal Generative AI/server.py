@@ -1,9 +1,22 @@
 import logging
 
 from mcp.server.fastmcp import FastMCP
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple
+from itertools import islice
+from datetime import datetime, timedelta
+import bisect
 import json
+import math
+import os
+
+from inventory_store import open_store, ItemExistsError, ItemNotFoundError, InsufficientStockError
+from inventory_indexes import stock_status, stock_ratio, encode_cursor, decode_cursor
+from inventory_format import (
+    respond, format_error, render_stock, render_stock_added, render_stock_removed, render_low_stock_alerts,
+    render_most_critical, render_summary, render_transactions, render_financials, render_item_created,
+    render_dashboard, render_supplier_contacts, render_supplier, render_supplier_stock_value,
+    render_supplier_reorder_needs, render_reorder_suggestions
+)
 
 # In-memory inventory database
 inventory = {
@@ -61,236 +74,414 @@ inventory = {
     }
 }
 
+# Supplier directory seed: contact and delivery lead time of each supplier
+suppliers = {
+    "Dell Technologies": {"contact": "1-800-DELL-TECH | orders@dell.com", "lead_time_days": 10},
+    "Office Depot": {"contact": "1-800-OFFICE | business@officedepot.com", "lead_time_days": 5},
+    "Staples": {"contact": "1-800-STAPLES | supplies@staples.com", "lead_time_days": 3},
+    "Samsung": {"contact": "1-800-SAMSUNG | b2b@samsung.com", "lead_time_days": 14}
+}
+
+# Lead time of the suppliers missing from the directory, and the sales window the daily demand is averaged on
+DEFAULT_LEAD_TIME_DAYS = int(os.getenv("DEFAULT_LEAD_TIME_DAYS", "7"))
+DEMAND_WINDOW_DAYS = int(os.getenv("DEMAND_WINDOW_DAYS", "30"))
+
+# Default and largest page of the paginated listings
+PAGE_SIZE = int(os.getenv("INVENTORY_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("INVENTORY_MAX_PAGE_SIZE", "500"))
+
+# Storage engine behind the tools: "memory" (the dict above) or "sqlite" (seeded with the dict above)
+# INVENTORY_JOURNAL_DIR makes the memory engine crash safe: write-ahead journal fsynced in groups (the mutations
+# arriving during an fsync share the next one, INVENTORY_FSYNC_INTERVAL seconds widens the groups),
+# snapshot every INVENTORY_SNAPSHOT_INTERVAL seconds
+store = open_store(
+    backend=os.getenv("INVENTORY_BACKEND", "memory"),
+    seed=inventory,
+    path=os.getenv("INVENTORY_DB_PATH", "inventory.db"),
+    journal_dir=os.getenv("INVENTORY_JOURNAL_DIR") or None,
+    fsync_interval=float(os.getenv("INVENTORY_FSYNC_INTERVAL", "0")),
+    snapshot_interval=float(os.getenv("INVENTORY_SNAPSHOT_INTERVAL", "300")),
+    suppliers=suppliers
+)
+
+
+# Push style notification when an item crosses a stock threshold
+def notify_threshold_crossing(item_code: str, old_status: str, new_status: str, item: Dict[str, Any]):
+    logging.warning(f"Stock status of {item['name']} ({item_code}): {old_status} → {new_status} "
+                    f"({item['quantity']} units, Min: {item['min_threshold']})")
+
+
+store.low_stock_index.subscribe(notify_threshold_crossing)
+
+STATUSES = ("CRITICAL", "LOW", "GOOD")
+
+
+def parse_status(status: Optional[str]) -> Optional[str]:
+    if status is None:
+        return None
+    if status.upper() not in STATUSES:
+        raise ValueError(f"Unknown status '{status}', use one of {', '.join(STATUSES)}")
+    return status.upper()
+
+
+def matches(item: Dict[str, Any], category: Optional[str] = None, supplier: Optional[str] = None,
+            status: Optional[str] = None) -> bool:
+    return ((not category or item['category'].lower() == category.lower())
+            and (not supplier or item['supplier'] == supplier)
+            and (not status or stock_status(item['quantity'], item['min_threshold']) == status))
+
+
+# Batch field checks, bool is an int subclass but never a valid quantity or price
+def is_count(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_amount(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def check_page(limit: int, offset: int = 0) -> Optional[str]:
+    """Error message of invalid pagination arguments, None when they are valid"""
+    if not is_count(limit) or not 0 <= limit <= MAX_PAGE_SIZE:
+        return f"limit must be an integer between 0 and {MAX_PAGE_SIZE}"
+    if not is_count(offset) or offset < 0:
+        return "offset must be a non-negative integer"
+    return None
+
+
+# Cursor keys of each listing: (stock ratio, item code) for the alerts, names for the others
+CURSOR_KEYS = {
+    "alerts": lambda key: (isinstance(key, tuple) and len(key) == 2 and is_amount(key[0])
+                           and isinstance(key[1], str)),
+    "categories": lambda key: isinstance(key, str),
+    "suppliers": lambda key: isinstance(key, str),
+}
+
+
+def read_cursor(kind: str, cursor: Optional[str]) -> Any:
+    """Index key to resume the listing kind after, None without a cursor. ValueError on a cursor of another listing"""
+    if not cursor:
+        return None
+    key = decode_cursor(kind, cursor)
+    if not CURSOR_KEYS[kind](key):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return key
+
+
+# Listings are generators of (cursor key, entry): the pages below read only the entries they return
+def take_page(kind: str, entries: Iterator[Tuple[Any, Dict[str, Any]]], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """The first limit entries and the cursor of the next page (None on the last page)"""
+    entries = iter(entries)
+    page = list(islice(entries, limit))
+    more = next(entries, None) is not None
+    return [entry for _, entry in page], encode_cursor(kind, page[-1][0]) if more and page else None
+
+
+def iter_items(category: Optional[str] = None, supplier: Optional[str] = None,
+               status: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Items matching the filters, starting from the most selective sorted index"""
+    if supplier:
+        codes = store.supplier_index.codes(supplier)
+    elif category:
+        codes = store.category_index.codes(category)
+    elif status in ("CRITICAL", "LOW"):
+        codes = (code for _, code in store.low_stock_index.iter_entries(status))
+    else:
+        codes = (code for code, _ in store.items())
+    for code in codes:
+        item = store.get_item(code)
+        if item and matches(item, category, supplier, status):
+            yield code, item
+
+
+def category_breakdown(items: Iterator[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, float]]:
+    categories = {}
+    for _, item in items:
+        stats = categories.setdefault(item['category'], {'items': 0, 'value': 0.0, 'quantity': 0})
+        stats['items'] += 1
+        stats['quantity'] += item['quantity']
+        stats['value'] += item['quantity'] * item['price']
+    return categories
+
+
+def iter_low_stock_alerts(status: Optional[str] = None, category: Optional[str] = None, supplier: Optional[str] = None,
+                          after: Optional[Tuple[float, str]] = None) -> Iterator[Tuple[Tuple[float, str], Dict[str, Any]]]:
+    for key in store.low_stock_index.iter_entries(status, after):
+        item = store.get_item(key[1])
+        if item and matches(item, category, supplier):
+            yield key, alert_entry(key[1], item)
+
+
+def iter_suppliers(category: Optional[str] = None, status: Optional[str] = None,
+                   after: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for supplier in store.supplier_index.values(after):
+        if category or status:
+            item_count = sum(1 for _ in iter_items(category, supplier, status))
+            if not item_count:
+                continue
+        else:
+            item_count = store.supplier_index.count(supplier)
+        yield supplier, {**supplier_record(supplier), "items": item_count}
+
+
+def supplier_page(category: Optional[str] = None, status: Optional[str] = None, limit: int = PAGE_SIZE,
+                  cursor: Optional[str] = None) -> Dict[str, Any]:
+    page, next_cursor = take_page("suppliers", iter_suppliers(category, status, read_cursor("suppliers", cursor)), limit)
+    return {"suppliers": page, "next_cursor": next_cursor}
+
+
+def supplier_record(name: str) -> Dict[str, Any]:
+    record = store.get_supplier(name) or {"contact": None, "lead_time_days": DEFAULT_LEAD_TIME_DAYS}
+    return {"name": name, **record}
+
+
+def alert_entry(code: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    return {"item_code": code, "name": item['name'], "quantity": item['quantity'],
+            "min_threshold": item['min_threshold'], "status": stock_status(item['quantity'], item['min_threshold']),
+            "supplier": item['supplier']}
+
 # Create MCP server
 mcp = FastMCP("InventoryManager")
 
 # Tool: Check stock levels
 @mcp.tool()
-def check_stock(item_code: str) -> str:
-    """Check current stock level and details for a specific item"""
-    item = inventory.get(item_code)
+def check_stock(item_code: str, output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Check current stock level and details for a specific item (output_format: "text" or "json")"""
+    item = store.get_item(item_code)
     if not item:
-        return f"Item code '{item_code}' not found in inventory."
-
-    status_icon = "🔴" if item['quantity'] <= item['min_threshold'] else "🟡" if item['quantity'] <= item['min_threshold'] * 2 else "🟢"
-    stock_status = "CRITICAL" if item['quantity'] <= item['min_threshold'] else "LOW" if item['quantity'] <= item['min_threshold'] * 2 else "GOOD"
-
-    total_value = item['quantity'] * item['price']
+        return respond({"error": f"Item code '{item_code}' not found in inventory."}, render_stock, output_format)
 
-    return f"""
-{status_icon} Stock Report: {item['name']} ({item_code})
-─────────────────────────────────────────────
-Current Stock: {item['quantity']} units
-Minimum Threshold: {item['min_threshold']} units
-Status: {stock_status}
-Unit Price: ${item['price']:.2f}
-Total Value: ${total_value:.2f}
-Supplier: {item['supplier']}
-Last Updated: {item['last_updated']}
-"""
+    return respond({
+        "item_code": item_code,
+        **item,
+        "status": stock_status(item['quantity'], item['min_threshold']),
+        "total_value": item['quantity'] * item['price'],
+    }, render_stock, output_format)
 
 # Tool: Add stock (purchase/restock)
 @mcp.tool()
-def add_stock(item_code: str, quantity: int, unit_cost: Optional[float] = None) -> str:
+def add_stock(item_code: str, quantity: int, unit_cost: Optional[float] = None,
+              output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
     """Add stock to inventory (purchase/restock operation)"""
-    if item_code not in inventory:
-        return f"Item code '{item_code}' not found. Use create_item() first."
+    # checked before the stock moves, an unknown format must not hide an applied mutation
+    if format_error(output_format):
+        return respond({}, render_stock_added, output_format)
+    item = store.get_item(item_code)
+    if not item:
+        return respond({"error": f"Item code '{item_code}' not found. Use create_item() first."},
+                       render_stock_added, output_format)
 
     if quantity <= 0:
-        return "Quantity must be greater than 0."
-
-    item = inventory[item_code]
-    old_quantity = item['quantity']
-    item['quantity'] += quantity
-    item['last_updated'] = datetime.now().strftime("%Y-%m-%d")
+        return respond({"error": "Quantity must be greater than 0."}, render_stock_added, output_format)
 
     # Record transaction
     cost = unit_cost or item['price'] * 0.85  # Default to 85% of selling price
-    transaction = {
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "type": "purchase",
+    old_quantity, new_quantity = store.add_stock(item_code, quantity, cost, datetime.now().strftime("%Y-%m-%d"))
+
+    return respond({
+        "item_code": item_code,
+        "name": item['name'],
         "quantity": quantity,
-        "unit_cost": cost
-    }
-    item['transactions'].append(transaction)
-
-    return f"""
-Stock Added Successfully!
-─────────────────────────
-Item: {item['name']} ({item_code})
-Added: {quantity} units
-Stock Level: {old_quantity} → {item['quantity']} units
-Unit Cost: ${cost:.2f}
-Total Cost: ${cost * quantity:.2f}
-"""
+        "before": old_quantity,
+        "after": new_quantity,
+        "unit_cost": cost,
+        "total_cost": cost * quantity,
+    }, render_stock_added, output_format)
 
 # Tool: Remove stock (sale/usage)
 @mcp.tool()
-def remove_stock(item_code: str, quantity: int, unit_price: Optional[float] = None) -> str:
+def remove_stock(item_code: str, quantity: int, unit_price: Optional[float] = None,
+                 output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
     """Remove stock from inventory (sale/usage operation)"""
-    if item_code not in inventory:
-        return f"Item code '{item_code}' not found."
+    if format_error(output_format):
+        return respond({}, render_stock_removed, output_format)
+    item = store.get_item(item_code)
+    if not item:
+        return respond({"error": f"Item code '{item_code}' not found."}, render_stock_removed, output_format)
 
     if quantity <= 0:
-        return "Quantity must be greater than 0."
-
-    item = inventory[item_code]
-    if item['quantity'] < quantity:
-        return f"Insufficient stock! Available: {item['quantity']}, Requested: {quantity}"
-
-    old_quantity = item['quantity']
-    item['quantity'] -= quantity
-    item['last_updated'] = datetime.now().strftime("%Y-%m-%d")
+        return respond({"error": "Quantity must be greater than 0."}, render_stock_removed, output_format)
 
     # Record transaction
     price = unit_price or item['price']
-    transaction = {
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "type": "sale",
+    try:
+        old_quantity, new_quantity = store.remove_stock(item_code, quantity, price, datetime.now().strftime("%Y-%m-%d"))
+    except InsufficientStockError as e:
+        return respond({"error": f"Insufficient stock! Available: {e.available}, Requested: {quantity}",
+                        "available": e.available, "requested": quantity}, render_stock_removed, output_format)
+
+    return respond({
+        "item_code": item_code,
+        "name": item['name'],
         "quantity": quantity,
-        "unit_price": price
-    }
-    item['transactions'].append(transaction)
-
-    # Check if stock is below threshold
-    warning = ""
-    if item['quantity'] <= item['min_threshold']:
-        warning = f"\n WARNING: Stock below minimum threshold ({item['min_threshold']} units)!"
-
-    return f"""
-Stock Removed Successfully!
-─────────────────────────
-Item: {item['name']} ({item_code})
-Removed: {quantity} units
-Stock Level: {old_quantity} → {item['quantity']} units
-Unit Price: ${price:.2f}
-Total Revenue: ${price * quantity:.2f}{warning}
-"""
+        "before": old_quantity,
+        "after": new_quantity,
+        "unit_price": price,
+        "total_revenue": price * quantity,
+        "min_threshold": item['min_threshold'],
+        # Check if stock is below threshold
+        "below_threshold": new_quantity <= item['min_threshold'],
+    }, render_stock_removed, output_format)
 
 # Tool: Get low stock alerts
 @mcp.tool()
-def get_low_stock_alerts() -> str:
-    """Get list of items that are low on stock or below minimum threshold"""
-    low_stock_items = []
-    critical_items = []
-
-    for code, item in inventory.items():
-        if item['quantity'] <= item['min_threshold']:
-            critical_items.append((code, item))
-        elif item['quantity'] <= item['min_threshold'] * 2:
-            low_stock_items.append((code, item))
-
-    if not low_stock_items and not critical_items:
-        return "All items are well-stocked!"
-
-    alert_msg = "Stock Alerts\n" + "="*50 + "\n"
-
-    if critical_items:
-        alert_msg += "\nCRITICAL - Reorder Immediately:\n"
-        for code, item in critical_items:
-            alert_msg += f"  • {item['name']} ({code}): {item['quantity']} units (Min: {item['min_threshold']})\n"
-
-    if low_stock_items:
-        alert_msg += "\n🟡 LOW STOCK - Consider Reordering:\n"
-        for code, item in low_stock_items:
-            alert_msg += f"  • {item['name']} ({code}): {item['quantity']} units (Min: {item['min_threshold']})\n"
-
-    return alert_msg
+def get_low_stock_alerts(limit: int = PAGE_SIZE, offset: int = 0, cursor: Optional[str] = None,
+                         status: Optional[str] = None, category: Optional[str] = None, supplier: Optional[str] = None,
+                         output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    Get list of items that are low on stock or below minimum threshold, most critical first.
+    Paginated with limit and offset or the cursor of the previous page, filtered by status (CRITICAL, LOW), category and supplier.
+    """
+    error = check_page(limit, offset)
+    if error:
+        return respond({"error": error}, render_low_stock_alerts, output_format)
+    try:
+        status = parse_status(status)
+        after = read_cursor("alerts", cursor)
+    except ValueError as e:
+        return respond({"error": str(e)}, render_low_stock_alerts, output_format)
+
+    # Only the flagged items are read, the low stock index keeps them sorted by quantity / min_threshold
+    alerts = islice(iter_low_stock_alerts(status, category, supplier, after), offset, None)
+    page, next_cursor = take_page("alerts", alerts, limit)
+
+    # the total is only known without the item level filters
+    total = store.low_stock_index.count(status) if not (category or supplier) else None
+    return respond({
+        "alerts": page,
+        "total": total,
+        "offset": offset,
+        "next_offset": offset + len(page) if next_cursor and not cursor else None,
+        "next_cursor": next_cursor,
+    }, render_low_stock_alerts, output_format)
+
+# Tool: Most critical items
+@mcp.tool()
+def get_most_critical_items(n: int = 10, output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Get the n items with the lowest stock relative to their minimum threshold"""
+    items = []
+    for code in store.low_stock_index.top(n):
+        item = store.get_item(code)
+        if item:
+            items.append({"item_code": code, "name": item['name'], "quantity": item['quantity'],
+                          "min_threshold": item['min_threshold']})
+    return respond({"items": items}, render_most_critical, output_format)
 
 # Tool: Get inventory summary by category
 @mcp.tool()
-def get_inventory_summary(category: Optional[str] = None) -> str:
-    """Get inventory summary, optionally filtered by category"""
-    filtered_items = inventory.items()
-
-    if category:
-        filtered_items = [(code, item) for code, item in inventory.items()
-                         if item['category'].lower() == category.lower()]
-        if not filtered_items:
-            return f"❌ No items found in category '{category}'"
-
-    total_value = 0
-    total_items = 0
-    categories = {}
-
-    summary = f"Inventory Summary"
-    if category:
-        summary += f" - {category.title()}"
-    summary += "\n" + "="*60 + "\n"
-
-    for code, item in filtered_items:
-        item_value = item['quantity'] * item['price']
-        total_value += item_value
-        total_items += item['quantity']
-
-        cat = item['category']
-        if cat not in categories:
-            categories[cat] = {'items': 0, 'value': 0, 'quantity': 0}
-        categories[cat]['items'] += 1
-        categories[cat]['value'] += item_value
-        categories[cat]['quantity'] += item['quantity']
-
-    # Category breakdown
-    for cat, stats in categories.items():
-        summary += f"\n{cat}:\n"
-        summary += f"   Items: {stats['items']} types\n"
-        summary += f"   Total Units: {stats['quantity']}\n"
-        summary += f"   Total Value: ${stats['value']:,.2f}\n"
-
-    summary += f"\n Grand Total: ${total_value:,.2f}"
-    summary += f"\n Total Units: {total_items:,}"
-    summary += f"\n Unique Items: {len(filtered_items)}"
-
-    return summary
+def get_inventory_summary(category: Optional[str] = None, supplier: Optional[str] = None, status: Optional[str] = None,
+                          limit: int = PAGE_SIZE, cursor: Optional[str] = None,
+                          output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    Get inventory summary by category, optionally filtered by category, supplier and status (CRITICAL, LOW, GOOD).
+    The category breakdown is paginated with limit and the cursor of the previous page, the totals cover every page.
+    """
+    error = check_page(limit)
+    if error:
+        return respond({"error": error}, render_summary, output_format)
+    try:
+        status = parse_status(status)
+        after = read_cursor("categories", cursor)
+    except ValueError as e:
+        return respond({"error": str(e)}, render_summary, output_format)
+
+    if supplier or status:
+        # Only the items of the supplier / status are read, through the sorted indexes
+        categories = category_breakdown(iter_items(category, supplier, status))
+    else:
+        # Running per category counters, no scan of the items
+        categories = store.aggregates.category_stats(category)
+
+    if not categories:
+        if category and not (supplier or status):
+            return respond({"error": f"❌ No items found in category '{category}'"}, render_summary, output_format)
+        if category or supplier or status:
+            return respond({"error": "❌ No items match the filters"}, render_summary, output_format)
+
+    names = sorted(categories)
+    start = bisect.bisect_right(names, after) if after is not None else 0
+    page, next_cursor = take_page("categories", ((name, name) for name in names[start:]), limit)
+
+    return respond({
+        "category": category,
+        "supplier": supplier,
+        "status": status,
+        "categories": {name: categories[name] for name in page},
+        "next_cursor": next_cursor,
+        "total_value": sum(stats['value'] for stats in categories.values()),
+        "total_units": sum(stats['quantity'] for stats in categories.values()),
+        "unique_items": sum(stats['items'] for stats in categories.values()),
+    }, render_summary, output_format)
 
 # Tool: Get transaction history
 @mcp.tool()
-def get_transaction_history(item_code: str, limit: int = 10) -> str:
-    """Get recent transaction history for an item"""
-    if item_code not in inventory:
-        return f" Item code '{item_code}' not found."
-
-    item = inventory[item_code]
-    transactions = item['transactions']
-
-    if not transactions:
-        return f"No transaction history found for {item['name']} ({item_code})."
-
-    # Sort by date (most recent first)
-    sorted_transactions = sorted(transactions, key=lambda x: x['date'], reverse=True)
-    limited_transactions = sorted_transactions[:limit]
+def get_transaction_history(item_code: str, limit: int = 10, offset: int = 0,
+                            output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Get recent transaction history for an item, most recent first (paginated with limit/offset)"""
+    error = check_page(limit, offset)
+    if error:
+        return respond({"error": error}, render_transactions, output_format)
+    item = store.get_item(item_code)
+    if not item:
+        return respond({"error": f" Item code '{item_code}' not found."}, render_transactions, output_format)
 
-    history = f"Transaction History: {item['name']} ({item_code})\n"
-    history += "="*60 + "\n"
+    transaction_count = store.transaction_count(item_code)
 
-    for i, trans in enumerate(limited_transactions, 1):
-        if trans['type'] == 'purchase':
-            amount = f"${trans['unit_cost']:.2f} each"
-            total = f"${trans['unit_cost'] * trans['quantity']:.2f}"
-        else:
-            amount = f"${trans['unit_price']:.2f} each"
-            total = f"${trans['unit_price'] * trans['quantity']:.2f}"
+    # Most recent first, only the requested rows are read
+    page = store.recent_transactions(item_code, offset + limit)[offset:] if transaction_count else []
 
-        history += f"{i:2}. {trans['date']} | {trans['type'].title()} | "
-        history += f"{trans['quantity']} units @ {amount} = {total}\n"
+    return respond({
+        "item_code": item_code,
+        "name": item['name'],
+        "total": transaction_count,
+        "offset": offset,
+        "transactions": page,
+        "next_offset": offset + len(page) if offset + len(page) < transaction_count else None,
+    }, render_transactions, output_format)
 
-    if len(transactions) > limit:
-        history += f"\n... and {len(transactions) - limit} more transactions"
-
-    return history
+# Tool: Revenue and cost of goods sold over a period
+@mcp.tool()
+def get_item_financials(item_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                        output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Get units sold, revenue, purchases and cost of goods sold of an item between two dates (YYYY-MM-DD, inclusive)"""
+    item = store.get_item(item_code)
+    if not item:
+        return respond({"error": f" Item code '{item_code}' not found."}, render_financials, output_format)
+
+    try:
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return respond({"error": "Invalid date. Use the YYYY-MM-DD format."}, render_financials, output_format)
+
+    figures = store.financials(item_code, start_date, end_date)
+
+    return respond({
+        "item_code": item_code,
+        "name": item['name'],
+        "start_date": start_date,
+        "end_date": end_date,
+        **figures,
+        "gross_margin": figures['revenue'] - figures['cogs'],
+    }, render_financials, output_format)
 
 # Tool: Create new item
 @mcp.tool()
 def create_item(item_code: str, name: str, category: str, initial_quantity: int,
-                price: float, min_threshold: int, supplier: str) -> str:
+                price: float, min_threshold: int, supplier: str,
+                output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
     """Create a new item in the inventory"""
-    if item_code in inventory:
-        return f"Item code '{item_code}' already exists."
+    if format_error(output_format):
+        return respond({}, render_item_created, output_format)
+    if item_code in store:
+        return respond({"error": f"Item code '{item_code}' already exists."}, render_item_created, output_format)
 
     if initial_quantity < 0 or price <= 0 or min_threshold < 0:
-        return "Invalid values. Quantity and threshold must be non-negative, price must be positive."
+        return respond({"error": "Invalid values. Quantity and threshold must be non-negative, price must be positive."},
+                       render_item_created, output_format)
 
-    inventory[item_code] = {
+    item = {
         "name": name,
         "category": category,
         "quantity": initial_quantity,
@@ -298,92 +489,283 @@ def create_item(item_code: str, name: str, category: str, initial_quantity: int,
         "price": price,
         "supplier": supplier,
         "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "transactions": []
     }
 
     # Add initial stock transaction if quantity > 0
+    transaction = None
     if initial_quantity > 0:
-        inventory[item_code]['transactions'].append({
+        transaction = {
             "date": datetime.now().strftime("%Y-%m-%d"),
             "type": "purchase",
             "quantity": initial_quantity,
             "unit_cost": price * 0.8  # Assume 80% cost ratio
-        })
-
-    return f"""
-New Item Created Successfully!
-─────────────────────────────────
-Item Code: {item_code}
-Name: {name}
-Category: {category}
-Initial Stock: {initial_quantity} units
-Price: ${price:.2f}
-Min Threshold: {min_threshold} units
-Supplier: {supplier}
-"""
+        }
 
-# Resource: Inventory dashboard
-@mcp.resource("dashboard://inventory-overview")
-def get_inventory_dashboard() -> str:
-    """Get a comprehensive inventory dashboard"""
-    total_items = len(inventory)
-    total_value = sum(item['quantity'] * item['price'] for item in inventory.values())
-    low_stock_count = sum(1 for item in inventory.values() if item['quantity'] <= item['min_threshold'])
-
-    categories = {}
-    for item in inventory.values():
-        cat = item['category']
-        if cat not in categories:
-            categories[cat] = 0
-        categories[cat] += 1
+    try:
+        store.create_item(item_code, item, transaction)
+    except ItemExistsError:
+        return respond({"error": f"Item code '{item_code}' already exists."}, render_item_created, output_format)
 
-    dashboard = f"""
-INVENTORY DASHBOARD
-{'='*50}
+    return respond({"item_code": item_code, **item}, render_item_created, output_format)
 
-Quick Stats:
-  └─ Total Items: {total_items} types
-  └─ Total Value: ${total_value:,.2f}
-  └─ Low Stock Alerts: {low_stock_count} items
+# Tool: Apply many stock movements at once
+@mcp.tool()
+def apply_stock_movements(movements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply a batch of purchases and sales in one atomic operation, either every movement is applied or none.
+    Each movement: {"item_code", "type": "purchase" | "sale", "quantity", optional "unit_cost" / "unit_price"}
+    """
+    items = store.get_items(sorted({m.get('item_code') for m in movements
+                                    if isinstance(m, dict) and isinstance(m.get('item_code'), str)}))
+    errors, planned = [], []
+    for index, movement in enumerate(movements):
+        if not isinstance(movement, dict):
+            errors.append({"index": index, "error": "Movement must be an object"})
+            continue
+        code, kind, quantity = movement.get('item_code'), movement.get('type'), movement.get('quantity')
+        price_field = 'unit_cost' if kind == "purchase" else 'unit_price'
+        price = movement.get(price_field)
+        if not isinstance(code, str) or code not in items:
+            errors.append({"index": index, "error": f"Item code '{code}' not found"})
+        elif kind not in ("purchase", "sale"):
+            errors.append({"index": index, "error": "Type must be 'purchase' or 'sale'"})
+        elif not is_count(quantity) or quantity <= 0:
+            errors.append({"index": index, "error": "Quantity must be an integer greater than 0"})
+        elif price is not None and (not is_amount(price) or price < 0):
+            errors.append({"index": index, "error": f"{price_field} must be a non-negative number"})
+        elif kind == "purchase":
+            cost = price or items[code]['price'] * 0.85  # Default to 85% of selling price
+            planned.append({"item_code": code, "type": kind, "quantity": quantity, "unit_cost": cost})
+        else:
+            price = price or items[code]['price']
+            planned.append({"item_code": code, "type": kind, "quantity": quantity, "unit_price": price})
+    if errors:
+        return {"applied": 0, "errors": errors}
+    if not planned:
+        return {"applied": 0, "items": {}}
+
+    try:
+        changes = store.apply_movements(planned, datetime.now().strftime("%Y-%m-%d"))
+    except InsufficientStockError as e:
+        return {"applied": 0, "errors": [{"item_code": e.item_code, "error": "Insufficient stock",
+                                          "available": e.available, "requested": e.requested}]}
+    except ItemNotFoundError as e:
+        return {"applied": 0, "errors": [{"item_code": e.item_code, "error": "Item not found"}]}
+
+    return {
+        "applied": len(planned),
+        "items": {code: {"before": old, "after": new, "status": stock_status(new, items[code]['min_threshold'])}
+                  for code, (old, new) in changes.items()},
+    }
 
-Categories:
-"""
+# Tool: Create many items at once
+@mcp.tool()
+def create_items(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Create a batch of items in one atomic operation, either every item is created or none.
+    Each item: {"item_code", "name", "category", "initial_quantity", "price", "min_threshold", "supplier"}
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    required = ("item_code", "name", "category", "initial_quantity", "price", "min_threshold", "supplier")
+    errors, entries, seen = [], [], set()
+    for index, spec in enumerate(items):
+        if not isinstance(spec, dict):
+            errors.append({"index": index, "error": "Item must be an object"})
+            continue
+        missing = [key for key in required if key not in spec]
+        if missing:
+            errors.append({"index": index, "error": f"Missing fields: {', '.join(missing)}"})
+            continue
+        not_text = [key for key in ("item_code", "name", "category", "supplier") if not isinstance(spec[key], str)]
+        if not_text:
+            errors.append({"index": index, "error": f"Fields must be strings: {', '.join(not_text)}"})
+            continue
+        if not is_count(spec['initial_quantity']) or not is_count(spec['min_threshold']) or not is_amount(spec['price']):
+            errors.append({"index": index, "error": "initial_quantity and min_threshold must be integers, price a number"})
+            continue
+        code = spec['item_code']
+        if code in seen or code in store:
+            errors.append({"index": index, "error": f"Item code '{code}' already exists"})
+            continue
+        seen.add(code)
+        if spec['initial_quantity'] < 0 or spec['price'] <= 0 or spec['min_threshold'] < 0:
+            errors.append({"index": index, "error": "Quantity and threshold must be non-negative, price must be positive"})
+            continue
+        item = {
+            "name": spec['name'],
+            "category": spec['category'],
+            "quantity": spec['initial_quantity'],
+            "min_threshold": spec['min_threshold'],
+            "price": spec['price'],
+            "supplier": spec['supplier'],
+            "last_updated": today,
+        }
+        transaction = None
+        if spec['initial_quantity'] > 0:
+            transaction = {"date": today, "type": "purchase", "quantity": spec['initial_quantity'],
+                           "unit_cost": spec['price'] * 0.8}  # Assume 80% cost ratio
+        entries.append((code, item, transaction))
+    if errors:
+        return {"created": 0, "errors": errors}
+
+    try:
+        store.create_items(entries)
+    except ItemExistsError as e:
+        return {"created": 0, "errors": [{"item_code": e.item_code, "error": "Item code already exists"}]}
+    return {"created": len(entries), "item_codes": [code for code, _, _ in entries]}
+
+# Tool: Check the stock of many items at once
+@mcp.tool()
+def check_stock_many(item_codes: List[str]) -> Dict[str, Any]:
+    """Check the stock level and status of several items in one call"""
+    codes = list(dict.fromkeys(item_codes))
+    items = store.get_items(codes)
+    return {
+        "items": {
+            code: {"quantity": items[code]['quantity'], "min_threshold": items[code]['min_threshold'],
+                   "status": stock_status(items[code]['quantity'], items[code]['min_threshold']),
+                   "price": items[code]['price']}
+            for code in codes if code in items
+        },
+        "not_found": [code for code in codes if code not in items],
+    }
 
-    for cat, count in categories.items():
-        dashboard += f"  └─ {cat}: {count} items\n"
+# Resource: Inventory dashboard
+@mcp.resource("dashboard://inventory-overview")
+def get_inventory_dashboard() -> str:
+    """Get a comprehensive inventory dashboard"""
+    aggregates = store.aggregates
+    return respond({
+        "total_items": aggregates.item_count,
+        "total_value": aggregates.total_value,
+        "low_stock_count": store.low_stock_index.count("CRITICAL"),
+        "categories": {cat: stats['items'] for cat, stats in aggregates.category_stats().items()},
+    }, render_dashboard, serialize=True)
+
+# Tool: List suppliers
+@mcp.tool()
+def get_suppliers(category: Optional[str] = None, status: Optional[str] = None, limit: int = PAGE_SIZE,
+                  cursor: Optional[str] = None, output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    List suppliers with their contact info in name order, optionally only the suppliers of items
+    in a category and/or stock status. Paginated with limit and the cursor of the previous page.
+    """
+    error = check_page(limit)
+    if error:
+        return respond({"error": error}, render_supplier_contacts, output_format)
+    try:
+        return respond(supplier_page(category, parse_status(status), limit, cursor),
+                       render_supplier_contacts, output_format)
+    except ValueError as e:
+        return respond({"error": str(e)}, render_supplier_contacts, output_format)
+
+# Tool: Register or update a supplier
+@mcp.tool()
+def set_supplier(name: str, contact: Optional[str] = None, lead_time_days: Optional[int] = None,
+                 output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Create or update a supplier of the directory (contact info and delivery lead time in days)"""
+    if format_error(output_format):
+        return respond({}, render_supplier, output_format)
+    current = store.get_supplier(name) or {"contact": None, "lead_time_days": DEFAULT_LEAD_TIME_DAYS}
+    if lead_time_days is not None and lead_time_days < 0:
+        return respond({"error": "Lead time must be non-negative."}, render_supplier, output_format)
+
+    record = {
+        "contact": contact if contact is not None else current['contact'],
+        "lead_time_days": lead_time_days if lead_time_days is not None else current['lead_time_days'],
+    }
+    store.put_supplier(name, record)
+    return respond({"name": name, **record, "items": store.supplier_index.count(name)}, render_supplier, output_format)
 
-    dashboard += f"""
-Action Required:
-  └─ Items needing reorder: {low_stock_count}
-  └─ Use get_low_stock_alerts() for details
+# Tool: Stock value held with a supplier
+@mcp.tool()
+def get_supplier_stock_value(supplier: str, output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Get the number of items, units and stock value provided by a supplier"""
+    # Running per supplier counters, no scan of the items
+    totals = store.supplier_totals.get(supplier)
+    if totals is None and store.get_supplier(supplier) is None:
+        return respond({"error": f"Supplier '{supplier}' not found."}, render_supplier_stock_value, output_format)
 
-Recent Activity:
-  └─ Use get_transaction_history() for item details
-"""
+    totals = totals or {'items': 0, 'quantity': 0, 'value': 0.0, 'reorder': 0}
+    return respond({**supplier_record(supplier), **totals}, render_supplier_stock_value, output_format)
 
-    return dashboard
+# Tool: Open reorder needs per supplier
+@mcp.tool()
+def get_supplier_reorder_needs(supplier: Optional[str] = None,
+                               output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """Get the LOW and CRITICAL items grouped by supplier, most critical first, optionally for one supplier"""
+    needs: Dict[str, List[Dict[str, Any]]] = {}
+    if supplier:
+        # Only the supplier's items, through the supplier -> items index
+        flagged = [(code, item) for code, item in iter_items(supplier=supplier)
+                   if stock_status(item['quantity'], item['min_threshold']) != "GOOD"]
+        flagged.sort(key=lambda entry: (stock_ratio(entry[1]['quantity'], entry[1]['min_threshold']), entry[0]))
+        if flagged:
+            needs[supplier] = [alert_entry(code, item) for code, item in flagged]
+    else:
+        # Only the flagged items, the low stock index already has them most critical first
+        for _, alert in iter_low_stock_alerts():
+            needs.setdefault(alert['supplier'], []).append(alert)
+
+    return respond({
+        "suppliers": [{**supplier_record(name), "items": needs[name]} for name in sorted(needs)]
+    }, render_supplier_reorder_needs, output_format)
+
+# Tool: Lead time aware reorder suggestions
+@mcp.tool()
+def get_reorder_suggestions(supplier: Optional[str] = None, demand_window_days: int = DEMAND_WINDOW_DAYS,
+                            output_format: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    Suggest purchase orders from the recent demand and the supplier lead times: an item needs a reorder when
+    the stock left by the time an order placed today is delivered is LOW or CRITICAL, the suggested quantity
+    brings it back to GOOD. The daily demand is the average of the sales over the last demand_window_days.
+    """
+    if demand_window_days <= 0:
+        return respond({"error": "The demand window must be at least one day."}, render_reorder_suggestions, output_format)
+
+    today = datetime.now().date()
+    start = (today - timedelta(days=demand_window_days - 1)).isoformat()
+    names = [supplier] if supplier else store.supplier_index.values()
+
+    suggestions = []
+    for name in names:
+        lead_time = supplier_record(name)['lead_time_days']
+        for code, item in iter_items(supplier=name):
+            daily_demand = store.financials(code, start, today.isoformat())['units_sold'] / demand_window_days
+            projected = item['quantity'] - daily_demand * lead_time
+            if projected > item['min_threshold'] * 2:
+                continue
+            suggestions.append({
+                "item_code": code,
+                "name": item['name'],
+                "supplier": name,
+                "quantity": item['quantity'],
+                "min_threshold": item['min_threshold'],
+                "daily_demand": round(daily_demand, 3),
+                "lead_time_days": lead_time,
+                "projected_at_delivery": round(projected, 1),
+                "order_quantity": math.ceil(item['min_threshold'] * 2 + 1 - projected),
+                "days_of_cover": round(item['quantity'] / daily_demand, 1) if daily_demand else None,
+            })
+
+    suggestions.sort(key=lambda s: (stock_ratio(s['projected_at_delivery'], s['min_threshold']), s['item_code']))
+    return respond({"demand_window_days": demand_window_days, "suggestions": suggestions},
+                   render_reorder_suggestions, output_format)
 
 # Resource: Supplier contact info
 @mcp.resource("contacts://suppliers")
 def get_supplier_contacts() -> str:
-    """Get supplier contact information"""
-    suppliers = set(item['supplier'] for item in inventory.values())
-
-    # Mock contact info (in real app, this would be from a database)
-    contact_info = {
-        "Dell Technologies": "1-800-DELL-TECH | orders@dell.com",
-        "Office Depot": "1-800-OFFICE | business@officedepot.com",
-        "Staples": "1-800-STAPLES | supplies@staples.com",
-        "Samsung": "1-800-SAMSUNG | b2b@samsung.com"
-    }
-
-    contacts = "Supplier Contact Directory\n" + "="*40 + "\n"
+    """Get supplier contact information, first page (the next ones are at contacts://suppliers/{next_cursor})"""
+    return respond(supplier_page(), render_supplier_contacts, serialize=True)
 
-    for supplier in sorted(suppliers):
-        contacts += f"\n{supplier}\n"
-        contacts += f"   {contact_info.get(supplier, ' Contact info not available')}\n"
 
-    return contacts
+@mcp.resource("contacts://suppliers/{cursor}")
+def get_supplier_contacts_page(cursor: str) -> str:
+    """Get supplier contact information, page after the cursor"""
+    try:
+        return respond(supplier_page(cursor=cursor), render_supplier_contacts, serialize=True)
+    except ValueError as e:
+        return respond({"error": str(e)}, render_supplier_contacts, serialize=True)
 
 if __name__ == "__main__":
     import logging
@@ -393,4 +775,7 @@ if __name__ == "__main__":
         datefmt='%Y-%m-%d %H:%M:%S'  #
     )
     logging.info("Server Started.. ")
-    mcp.run()
\ No newline at end of file
+    try:
+        mcp.run()
+    finally:
+        store.close()
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Shared test suite of the inventory storage engines, every test runs against both backends.
+
+    pytest test_inventory_store.py
+"""
+import threading
+import copy
+
+import pytest
+
+from inventory_store import open_store, ItemExistsError, ItemNotFoundError, InsufficientStockError
+from inventory_journal import JournalError
+import inventory_journal
+
+SEED = {
+    "LAPTOP001": {
+        "name": "Dell Latitude 7420", "category": "Electronics", "quantity": 15, "min_threshold": 5,
+        "price": 1200.00, "supplier": "Dell Technologies", "last_updated": "2025-01-15",
+        "transactions": [
+            {"date": "2025-01-10", "type": "purchase", "quantity": 20, "unit_cost": 1150.00},
+            {"date": "2025-01-12", "type": "sale", "quantity": 5, "unit_price": 1200.00},
+        ],
+    },
+    "PAPER001": {
+        "name": "A4 Copy Paper (500 sheets)", "category": "Office Supplies", "quantity": 2, "min_threshold": 10,
+        "price": 8.99, "supplier": "Staples", "last_updated": "2025-01-13",
+        "transactions": [
+            {"date": "2025-01-01", "type": "purchase", "quantity": 50, "unit_cost": 7.50},
+            {"date": "2025-01-10", "type": "sale", "quantity": 48, "unit_price": 8.99},
+        ],
+    },
+}
+
+SEED_COPY = copy.deepcopy(SEED)
+
+SUPPLIERS = {
+    "Dell Technologies": {"contact": "orders@dell.com", "lead_time_days": 10},
+    "Staples": {"contact": "orders@staples.com", "lead_time_days": 3},
+}
+
+
+def new_item(quantity=0, category="Furniture", supplier="Office Depot"):
+    return {"name": "Desk", "category": category, "quantity": quantity, "min_threshold": 2,
+            "price": 250.0, "supplier": supplier, "last_updated": "2025-02-01"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = open_store(request.param, seed=SEED, path=str(tmp_path / "inventory.db"), suppliers=SUPPLIERS)
+    yield store
+    assert store.check_indexes() == []
+    store.close()
+
+
+def test_seed(store):
+    assert len(store) == 2
+    assert "LAPTOP001" in store
+    assert "MISSING" not in store
+    assert store.get_item("LAPTOP001")["quantity"] == 15
+    assert store.get_item("MISSING") is None
+    assert [code for code, _ in store.items()] == ["LAPTOP001", "PAPER001"]
+    assert [code for code, _ in store.items_by_category("office supplies")] == ["PAPER001"]
+    assert store.transaction_count("LAPTOP001") == 2
+
+
+def test_create_item(store):
+    transaction = {"date": "2025-02-01", "type": "purchase", "quantity": 4, "unit_cost": 200.0}
+    store.create_item("DESK001", new_item(quantity=4), transaction)
+    assert store.get_item("DESK001") == new_item(quantity=4)
+    assert store.transactions("DESK001") == [transaction]
+    assert [code for code, _ in store.items_by_category("Furniture")] == ["DESK001"]
+
+
+def test_create_existing_item(store):
+    with pytest.raises(ItemExistsError):
+        store.create_item("LAPTOP001", new_item())
+    assert store.get_item("LAPTOP001")["name"] == "Dell Latitude 7420"
+
+
+def test_add_and_remove_stock(store):
+    assert store.add_stock("LAPTOP001", 5, 1100.0, "2025-02-01") == (15, 20)
+    assert store.remove_stock("LAPTOP001", 8, 1250.0, "2025-02-02") == (20, 12)
+    item = store.get_item("LAPTOP001")
+    assert item["quantity"] == 12
+    assert item["last_updated"] == "2025-02-02"
+    assert store.recent_transactions("LAPTOP001", 2) == [
+        {"date": "2025-02-02", "type": "sale", "quantity": 8, "unit_price": 1250.0},
+        {"date": "2025-02-01", "type": "purchase", "quantity": 5, "unit_cost": 1100.0},
+    ]
+
+
+def test_unknown_item(store):
+    with pytest.raises(ItemNotFoundError):
+        store.add_stock("MISSING", 1, 1.0, "2025-02-01")
+    with pytest.raises(ItemNotFoundError):
+        store.remove_stock("MISSING", 1, 1.0, "2025-02-01")
+    with pytest.raises(ItemNotFoundError):
+        store.transactions("MISSING")
+
+
+def test_insufficient_stock(store):
+    with pytest.raises(InsufficientStockError) as error:
+        store.remove_stock("PAPER001", 3, 8.99, "2025-02-01")
+    assert (error.value.item_code, error.value.available, error.value.requested) == ("PAPER001", 2, 3)
+    assert store.get_item("PAPER001")["quantity"] == 2
+    assert store.transaction_count("PAPER001") == 2
+
+
+def test_create_items_all_or_none(store):
+    with pytest.raises(ItemExistsError):
+        store.create_items([("DESK001", new_item(), None), ("LAPTOP001", new_item(), None)])
+    assert "DESK001" not in store
+    with pytest.raises(ItemExistsError):
+        store.create_items([("DESK001", new_item(), None), ("DESK001", new_item(), None)])
+    assert "DESK001" not in store
+
+    store.create_items([("DESK001", new_item(quantity=1), None), ("DESK002", new_item(quantity=2), None)])
+    assert store.get_items(["DESK001", "DESK002", "MISSING"]).keys() == {"DESK001", "DESK002"}
+
+
+def test_apply_movements(store):
+    movements = [
+        {"item_code": "PAPER001", "type": "purchase", "quantity": 10, "unit_cost": 7.0},
+        {"item_code": "PAPER001", "type": "sale", "quantity": 11, "unit_price": 9.0},
+        {"item_code": "LAPTOP001", "type": "sale", "quantity": 1, "unit_price": 1200.0},
+    ]
+    assert store.apply_movements(movements, "2025-02-01") == {"LAPTOP001": (15, 14), "PAPER001": (2, 1)}
+    assert store.transaction_count("PAPER001") == 4
+    assert store.get_item("PAPER001")["last_updated"] == "2025-02-01"
+
+
+def test_apply_movements_all_or_none(store):
+    oversold = [
+        {"item_code": "LAPTOP001", "type": "sale", "quantity": 1, "unit_price": 1200.0},
+        {"item_code": "PAPER001", "type": "sale", "quantity": 3, "unit_price": 9.0},
+    ]
+    with pytest.raises(InsufficientStockError):
+        store.apply_movements(oversold, "2025-02-01")
+    unknown = [
+        {"item_code": "LAPTOP001", "type": "sale", "quantity": 1, "unit_price": 1200.0},
+        {"item_code": "MISSING", "type": "purchase", "quantity": 1, "unit_cost": 1.0},
+    ]
+    with pytest.raises(ItemNotFoundError):
+        store.apply_movements(unknown, "2025-02-01")
+    assert store.get_item("LAPTOP001")["quantity"] == 15
+    assert store.transaction_count("LAPTOP001") == 2
+
+
+def test_financials(store):
+    store.add_stock("LAPTOP001", 10, 1000.0, "2025-02-01")
+    store.remove_stock("LAPTOP001", 4, 1300.0, "2025-02-03")
+    assert store.financials("LAPTOP001") == {
+        "units_sold": 9, "revenue": 5 * 1200.0 + 4 * 1300.0,
+        "units_purchased": 30, "purchase_cost": 20 * 1150.0 + 10 * 1000.0,
+        "cogs": pytest.approx(9 * (20 * 1150.0 + 10 * 1000.0) / 30),
+    }
+    # COGS at the average cost of the purchases up to the end of the period
+    assert store.financials("LAPTOP001", start_date="2025-01-11", end_date="2025-01-31") == {
+        "units_sold": 5, "revenue": 6000.0, "units_purchased": 0, "purchase_cost": 0.0, "cogs": 5 * 1150.0,
+    }
+
+
+def test_suppliers(store):
+    assert store.get_supplier("Staples") == SUPPLIERS["Staples"]
+    assert store.get_supplier("Nobody") is None
+    store.put_supplier("Office Depot", {"contact": "business@officedepot.com", "lead_time_days": 5})
+    assert [name for name, _ in store.suppliers()] == ["Dell Technologies", "Office Depot", "Staples"]
+
+
+def test_indexes_follow_mutations(store):
+    store.create_items([("DESK001", new_item(quantity=1), None), ("CHAIR001", new_item(quantity=9), None)])
+    store.add_stock("PAPER001", 30, 7.0, "2025-02-01")
+    store.remove_stock("LAPTOP001", 12, 1200.0, "2025-02-01")
+    store.apply_movements([{"item_code": "DESK001", "type": "purchase", "quantity": 5, "unit_cost": 200.0}],
+                          "2025-02-02")
+    assert store.check_indexes() == []
+    assert list(store.category_index.codes("furniture")) == ["CHAIR001", "DESK001"]
+    assert store.supplier_totals.get("Office Depot")["items"] == 2
+
+
+def test_listing_during_creates(store):
+    # listings run while other clients keep adding items
+    done = threading.Event()
+
+    def create():
+        for i in range(300):
+            store.create_item(f"DESK{i:03}", new_item(quantity=i))
+        done.set()
+
+    writer = threading.Thread(target=create)
+    writer.start()
+    while not done.is_set():
+        assert len(list(store.items())) >= 2
+        store.items_by_category("Furniture")
+    writer.join()
+    assert len(store.items_by_category("furniture")) == 300
+
+
+def test_journal_recovery_with_path_like_codes(tmp_path):
+    # item codes are never used as file names in a snapshot
+    codes = ["AB/12", "..", ".", "ok"]
+    store = open_store("memory", seed={}, journal_dir=str(tmp_path), snapshot_interval=0)
+    for code in codes:
+        store.create_item(code, new_item(), None)
+        store.add_stock(code, 3, 200.0, "2025-02-01")
+    store.snapshot()
+    store.remove_stock("AB/12", 1, 250.0, "2025-02-02")
+    store.close()
+
+    recovered = open_store("memory", seed={}, journal_dir=str(tmp_path), snapshot_interval=0)
+    assert {code: item["quantity"] for code, item in recovered.items()} == {"AB/12": 2, "..": 3, ".": 3, "ok": 3}
+    assert recovered.transaction_count("AB/12") == 2
+    assert recovered.check_indexes() == []
+    recovered.close()
+
+
+@pytest.mark.parametrize("limit", [-1, 0, 1, 5])
+def test_recent_transactions_limit(store, limit):
+    # same answer from both engines, a negative limit is not "no limit"
+    expected = [
+        {"date": "2025-01-12", "type": "sale", "quantity": 5, "unit_price": 1200.0},
+        {"date": "2025-01-10", "type": "purchase", "quantity": 20, "unit_cost": 1150.0},
+    ]
+    assert store.recent_transactions("LAPTOP001", limit) == expected[:max(limit, 0)]
+
+
+def test_seed_not_modified(store, tmp_path):
+    # the seed keeps its transactions, a second store built from it gets the same history
+    assert SEED == SEED_COPY
+    again = open_store("memory", seed=SEED)
+    assert again.transactions("PAPER001") == store.transactions("PAPER001") == SEED["PAPER001"]["transactions"]
+    again.close()
+
+
+@pytest.mark.parametrize("fsync_interval", [0, 0.001])
+def test_journal_write_failure(tmp_path, monkeypatch, fsync_interval):
+    # a failed fsync is never acknowledged, the journal refuses the later mutations
+    store = open_store("memory", seed=SEED, journal_dir=str(tmp_path), fsync_interval=fsync_interval,
+                       snapshot_interval=0)
+    store.add_stock("LAPTOP001", 1, 1100.0, "2025-02-01")
+
+    def broken_fsync(fd):
+        raise OSError(5, "Input/output error")
+
+    monkeypatch.setattr(inventory_journal.os, "fsync", broken_fsync)
+    with pytest.raises(JournalError):
+        store.add_stock("LAPTOP001", 2, 1100.0, "2025-02-02")
+    monkeypatch.undo()
+    with pytest.raises(JournalError):
+        store.remove_stock("PAPER001", 1, 8.99, "2025-02-02")
+    assert store.get_item("PAPER001")["quantity"] == 2
+    store.close()
+
+    # the line of the failed fsync may or may not have reached the disk, the rejected mutation never did
+    recovered = open_store("memory", seed={}, journal_dir=str(tmp_path), snapshot_interval=0)
+    assert recovered.get_item("LAPTOP001")["quantity"] in (16, 18)
+    assert recovered.get_item("PAPER001")["quantity"] == 2
+    assert recovered.check_indexes() == []
+    recovered.close()
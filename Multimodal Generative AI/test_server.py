@@ -0,0 +1,176 @@
+"""
+Tool level tests of the InventoryManager server: batch tools, JSON output, cursor pagination,
+supplier directory and the error paths of their arguments. Each test gets a fresh memory store.
+
+    pytest test_server.py
+"""
+import asyncio
+import json
+
+import pytest
+
+import inventory_format
+import server
+from inventory_store import open_store
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = open_store("memory", seed=server.inventory, suppliers=server.suppliers)
+    monkeypatch.setattr(server, "store", store)
+    yield store
+    assert store.check_indexes() == []
+    store.close()
+
+
+def low_items(count):
+    # CRITICAL items of increasing stock ratio 0/4, 1/4, 2/4 ... (PAPER001 is at 2/10)
+    return [{"item_code": f"PEN{i:03}", "name": f"Pen {i}", "category": "Office Supplies", "initial_quantity": i,
+             "price": 1.5, "min_threshold": 4, "supplier": "Staples"} for i in range(count)]
+
+
+def read_resource(uri):
+    return asyncio.run(server.mcp.read_resource(uri))[0].content
+
+
+def test_create_items(store):
+    assert server.create_items(low_items(3)) == {"created": 3, "item_codes": ["PEN000", "PEN001", "PEN002"]}
+    assert store.get_item("PEN002")["quantity"] == 2
+    assert store.transaction_count("PEN000") == 0
+
+
+def test_create_items_all_or_none(store):
+    items = low_items(2) + [{"item_code": "LAPTOP001"}, "not an item",
+                            {**low_items(1)[0], "item_code": "PEN009", "price": True}]
+    result = server.create_items(items)
+    assert result["created"] == 0
+    assert [error["index"] for error in result["errors"]] == [2, 3, 4]
+    assert "PEN000" not in store
+
+
+def test_apply_stock_movements(store):
+    result = server.apply_stock_movements([
+        {"item_code": "PAPER001", "type": "purchase", "quantity": 20, "unit_cost": 7.0},
+        {"item_code": "LAPTOP001", "type": "sale", "quantity": 12},
+    ])
+    assert result == {"applied": 2, "items": {
+        "LAPTOP001": {"before": 15, "after": 3, "status": "CRITICAL"},
+        "PAPER001": {"before": 2, "after": 22, "status": "GOOD"},
+    }}
+    assert store.recent_transactions("LAPTOP001", 1)[0]["unit_price"] == 1200.0
+
+
+def test_apply_stock_movements_errors(store):
+    result = server.apply_stock_movements([
+        {"item_code": "PAPER001", "type": "purchase", "quantity": 1},
+        {"item_code": ["PAPER001"], "type": "sale", "quantity": 1},
+        {"item_code": "PAPER001", "type": "gift", "quantity": 1},
+        {"item_code": "PAPER001", "type": "sale", "quantity": True},
+        {"item_code": "PAPER001", "type": "sale", "quantity": 1, "unit_price": -1},
+        42,
+    ])
+    assert result["applied"] == 0
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3, 4, 5]
+
+    oversold = server.apply_stock_movements([{"item_code": "PAPER001", "type": "sale", "quantity": 3}])
+    assert oversold == {"applied": 0, "errors": [{"item_code": "PAPER001", "error": "Insufficient stock",
+                                                  "available": 2, "requested": 3}]}
+    assert store.get_item("PAPER001")["quantity"] == 2
+
+
+def test_check_stock_many():
+    result = server.check_stock_many(["PAPER001", "MISSING", "PAPER001"])
+    assert result == {"items": {"PAPER001": {"quantity": 2, "min_threshold": 10, "status": "CRITICAL", "price": 8.99}},
+                      "not_found": ["MISSING"]}
+
+
+def test_json_output():
+    stock = server.check_stock("PAPER001", output_format="JSON")
+    assert (stock["quantity"], stock["status"], stock["total_value"]) == (2, "CRITICAL", pytest.approx(17.98))
+    assert server.check_stock("MISSING", output_format="json") == {
+        "error": "Item code 'MISSING' not found in inventory."}
+    assert "Stock Report" in server.check_stock("PAPER001", output_format="text")
+
+
+def test_unknown_output_format(store):
+    assert server.check_stock("PAPER001", output_format="xml").startswith("Unknown output format 'xml'")
+    # the mutation is not applied behind the error
+    assert server.add_stock("PAPER001", 5, output_format="xml").startswith("Unknown output format")
+    assert store.get_item("PAPER001")["quantity"] == 2
+
+
+def test_low_stock_alerts_pagination():
+    server.create_items(low_items(5))
+    first = server.get_low_stock_alerts(limit=2, output_format="json")
+    assert [alert["item_code"] for alert in first["alerts"]] == ["PEN000", "PAPER001"]
+    assert (first["total"], first["next_offset"]) == (6, 2)
+
+    # offset and cursor pages agree
+    by_offset = server.get_low_stock_alerts(limit=2, offset=2, output_format="json")
+    by_cursor = server.get_low_stock_alerts(limit=2, cursor=first["next_cursor"], output_format="json")
+    assert by_offset["alerts"] == by_cursor["alerts"]
+    assert [alert["item_code"] for alert in by_cursor["alerts"]] == ["PEN001", "PEN002"]
+
+    last = server.get_low_stock_alerts(limit=10, offset=4, output_format="json")
+    assert [alert["item_code"] for alert in last["alerts"]] == ["PEN003", "PEN004"]
+    assert last["next_cursor"] is None
+    assert len(server.get_low_stock_alerts(output_format="json")["alerts"]) == 6
+
+
+@pytest.mark.parametrize("arguments, error", [
+    ({"offset": -1}, "offset must be a non-negative integer"),
+    ({"limit": -1}, "limit must be an integer between 0 and 500"),
+    ({"limit": 100000}, "limit must be an integer between 0 and 500"),
+    ({"cursor": "not a cursor"}, "Invalid cursor 'not a cursor'"),
+    ({"status": "EMPTY"}, "Unknown status 'EMPTY', use one of CRITICAL, LOW, GOOD"),
+])
+def test_low_stock_alerts_errors(arguments, error):
+    assert server.get_low_stock_alerts(**arguments, output_format="json") == {"error": error}
+
+
+def test_cursor_of_another_listing():
+    cursor = server.get_suppliers(limit=1, output_format="json")["next_cursor"]
+    for tool in (server.get_low_stock_alerts, server.get_inventory_summary):
+        assert "not a cursor of this listing" in tool(cursor=cursor, output_format="json")["error"]
+
+
+def test_inventory_summary_pagination():
+    first = server.get_inventory_summary(limit=2, output_format="json")
+    assert list(first["categories"]) == ["Electronics", "Furniture"]
+    assert first["unique_items"] == 4
+    rest = server.get_inventory_summary(limit=2, cursor=first["next_cursor"], output_format="json")
+    assert list(rest["categories"]) == ["Office Supplies"]
+    assert rest["next_cursor"] is None
+    assert server.get_inventory_summary(limit=True, output_format="json") == {
+        "error": "limit must be an integer between 0 and 500"}
+
+
+def test_supplier_directory(store):
+    server.create_items([{**low_items(1)[0], "supplier": "Acme"}])
+    saved = server.set_supplier("Acme", contact="sales@acme.test", lead_time_days=2, output_format="json")
+    assert saved == {"name": "Acme", "contact": "sales@acme.test", "lead_time_days": 2, "items": 1}
+    assert server.set_supplier("Acme", lead_time_days=-1, output_format="json") == {
+        "error": "Lead time must be non-negative."}
+
+    names, cursor = [], None
+    while True:
+        page = server.get_suppliers(limit=2, cursor=cursor, output_format="json")
+        names += [supplier["name"] for supplier in page["suppliers"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == ["Acme", "Dell Technologies", "Office Depot", "Samsung", "Staples"]
+    assert [s["name"] for s in server.get_suppliers(status="critical", output_format="json")["suppliers"]] == ["Acme", "Staples"]
+
+
+def test_supplier_contacts_resource(monkeypatch):
+    monkeypatch.setattr(inventory_format, "DEFAULT_OUTPUT_FORMAT", "json")
+    # the directory lists the suppliers of the items
+    server.create_items([{**item, "supplier": f"Acme {i:03}"} for i, item in enumerate(low_items(server.PAGE_SIZE))])
+    first = json.loads(read_resource("contacts://suppliers"))
+    assert len(first["suppliers"]) == server.PAGE_SIZE
+    rest = json.loads(read_resource(f"contacts://suppliers/{first['next_cursor']}"))
+    assert [supplier["name"] for supplier in rest["suppliers"]] == ["Dell Technologies", "Office Depot", "Samsung",
+                                                                   "Staples"]
+    assert rest["next_cursor"] is None
+    assert json.loads(read_resource("contacts://suppliers/bogus")) == {"error": "Invalid cursor 'bogus'"}
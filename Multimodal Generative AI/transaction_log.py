@@ -0,0 +1,205 @@
+"""
+Append only, columnar transaction log of the in-memory inventory.
+
+Each item owns a chunk of NumPy columns (day, type, quantity, price) instead of a list of dicts:
+dates are int32 days since 1970-01-01, the type is a uint8 code and the price column holds the
+unit cost of purchases and the unit price of sales. While rows arrive in date order (the normal case)
+"last N" and date range queries are slices found with a binary search, no sort and no per row dict.
+The chunks can be saved as .npy files and loaded back memory mapped.
+"""
+from typing import Dict, Any, List, Optional, Iterator
+from datetime import date
+import numpy as np
+import os
+
+TRANSACTION_TYPES = ("purchase", "sale")
+TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+PURCHASE, SALE = TYPE_CODES["purchase"], TYPE_CODES["sale"]
+# price column name of each transaction type in the dict representation
+PRICE_FIELDS = ("unit_cost", "unit_price")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+COLUMNS = {"day": np.int32, "kind": np.uint8, "quantity": np.int64, "price": np.float64}
+
+
+def to_day(value: str) -> int:
+    return date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day: int) -> str:
+    return date.fromordinal(int(day) + EPOCH_ORDINAL).isoformat()
+
+
+def fsync_dir(folder: str):
+    """Make the entries (new files, renames) of a folder durable"""
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ItemLog:
+    """Columns of one item, grown by doubling so appends are amortized O(1)"""
+
+    INITIAL_CAPACITY = 8
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        if columns is None:
+            columns = {name: np.empty(self.INITIAL_CAPACITY, dtype=dtype) for name, dtype in COLUMNS.items()}
+            self.size = 0
+        else:
+            self.size = len(columns["day"])
+        self.columns = columns
+        day = columns["day"][:self.size]
+        self.sorted = bool(np.all(day[1:] >= day[:-1])) if self.size > 1 else True
+
+    def __len__(self):
+        return self.size
+
+    def append(self, day: int, kind: int, quantity: int, price: float):
+        capacity = len(self.columns["day"])
+        if self.size == capacity:
+            # also turns a read only memory mapped chunk into a regular in-memory one
+            for name, column in self.columns.items():
+                grown = np.empty(max(capacity * 2, self.INITIAL_CAPACITY), dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = grown
+        if self.size and day < self.columns["day"][self.size - 1]:
+            self.sorted = False
+        for name, value in (("day", day), ("kind", kind), ("quantity", quantity), ("price", price)):
+            self.columns[name][self.size] = value
+        self.size += 1
+
+    def _order(self) -> np.ndarray:
+        """Row positions in date order (stable, insertion order inside a day)"""
+        if self.sorted:
+            return np.arange(self.size)
+        return np.argsort(self.columns["day"][:self.size], kind="stable")
+
+    def _rows(self, positions) -> List[Dict[str, Any]]:
+        day, kind, quantity, price = (self.columns[name] for name in COLUMNS)
+        return [
+            {"date": from_day(day[i]), "type": TRANSACTION_TYPES[kind[i]], "quantity": int(quantity[i]),
+             PRICE_FIELDS[kind[i]]: float(price[i])}
+            for i in positions
+        ]
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._rows(range(self.size))
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """The limit most recent rows, newest first"""
+        if limit <= 0:
+            return []
+        if self.sorted:
+            return self._rows(range(self.size - 1, max(self.size - limit, 0) - 1, -1))
+        return self._rows(self._order()[::-1][:limit])
+
+    def _range(self, start_day: Optional[int], end_day: Optional[int]) -> np.ndarray:
+        """Row positions of the period in date order, two binary searches when the rows are sorted"""
+        if self.sorted:
+            order = None
+            days = self.columns["day"][:self.size]
+        else:
+            order = self._order()
+            days = self.columns["day"][:self.size][order]
+        lo = 0 if start_day is None else int(np.searchsorted(days, start_day, side="left"))
+        hi = self.size if end_day is None else int(np.searchsorted(days, end_day, side="right"))
+        return np.arange(lo, hi) if order is None else order[lo:hi]
+
+    def between(self, start_day: Optional[int], end_day: Optional[int]) -> List[Dict[str, Any]]:
+        return self._rows(self._range(start_day, end_day))
+
+    def financials(self, start_day: Optional[int], end_day: Optional[int]) -> Dict[str, float]:
+        """
+        Revenue and cost of goods sold of the period, vectorized over the columns.
+        COGS values the units sold at the average purchase cost up to the end of the period.
+        """
+        positions = self._range(start_day, end_day)
+        kind = self.columns["kind"][positions]
+        quantity = self.columns["quantity"][positions]
+        amount = quantity * self.columns["price"][positions]
+        sales, purchases = kind == SALE, kind == PURCHASE
+
+        # average cost of everything purchased up to the end of the period
+        history = self._range(None, end_day)
+        bought = self.columns["kind"][history] == PURCHASE
+        bought_units = self.columns["quantity"][history][bought].sum()
+        bought_cost = (self.columns["quantity"][history][bought] * self.columns["price"][history][bought]).sum()
+        average_cost = bought_cost / bought_units if bought_units else 0.0
+
+        units_sold = int(quantity[sales].sum())
+        return {
+            "units_sold": units_sold,
+            "revenue": float(amount[sales].sum()),
+            "units_purchased": int(quantity[purchases].sum()),
+            "purchase_cost": float(amount[purchases].sum()),
+            "cogs": float(units_sold * average_cost),
+        }
+
+    def copy(self) -> "ItemLog":
+        return ItemLog({name: column[:self.size].copy() for name, column in self.columns.items()})
+
+    def save(self, folder: str):
+        """Write the columns and fsync them and the folder, they replace journal segments once saved"""
+        os.makedirs(folder, exist_ok=True)
+        for name, column in self.columns.items():
+            with open(os.path.join(folder, f"{name}.npy"), "wb") as f:
+                np.save(f, column[:self.size])
+                f.flush()
+                os.fsync(f.fileno())
+        fsync_dir(folder)
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> "ItemLog":
+        mode = "r" if mmap else None
+        return cls({name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS})
+
+
+class TransactionLog:
+    """Item code -> ItemLog. Callers serialize the appends of an item (the store holds its lock)"""
+
+    def __init__(self):
+        self._items: Dict[str, ItemLog] = {}
+
+    def item(self, item_code: str) -> ItemLog:
+        log = self._items.get(item_code)
+        if log is None:
+            log = self._items.setdefault(item_code, ItemLog())
+        return log
+
+    def append(self, item_code: str, transaction: Dict[str, Any]):
+        kind = TYPE_CODES[transaction["type"]]
+        self.item(item_code).append(to_day(transaction["date"]), kind, transaction["quantity"],
+                                    transaction[PRICE_FIELDS[kind]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def copy(self) -> "TransactionLog":
+        """Independent copy of the columns (a snapshot), callers hold the locks of every item"""
+        transaction_log = TransactionLog()
+        transaction_log._items = {item_code: log.copy() for item_code, log in self._items.items()}
+        return transaction_log
+
+    def save(self, folder: str) -> Dict[str, str]:
+        """
+        One folder of .npy columns per item. The folders are numbered rather than named after the
+        item codes (a code may hold "/" or be ".."), returns item_code -> folder name for load()
+        """
+        folders = {}
+        os.makedirs(folder, exist_ok=True)
+        for number, (item_code, log) in enumerate(self._items.items()):
+            folders[item_code] = f"{number:06d}"
+            log.save(os.path.join(folder, folders[item_code]))
+        fsync_dir(folder)
+        return folders
+
+    @classmethod
+    def load(cls, folder: str, folders: Dict[str, str], mmap: bool = True) -> "TransactionLog":
+        """folders is the item_code -> folder name map returned by save(), the folder names are never item codes"""
+        transaction_log = cls()
+        for item_code, name in folders.items():
+            transaction_log._items[item_code] = ItemLog.load(os.path.join(folder, name), mmap=mmap)
+        return transaction_log
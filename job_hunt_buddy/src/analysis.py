@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import queue
+import os
+import time
+
+# Logging configuration
+import logging
+from rich.logging import RichHandler
+
+# Configure basic config with RichHandler
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(message)s", # Rich handles the timestamp and level separately
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)]
+)
+
+logger = logging.getLogger("analysis")
+# The answer and first token timings are logged at INFO, above the WARNING of the root logger
+logger.setLevel(os.getenv("ANALYSIS_LOG_LEVEL", "INFO").upper())
+
+# Upper bound of questions sent to the LLM at the same time
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENT_QUESTIONS", "9"))
+# Prefix of the answer text of a failed question
+ERROR_PREFIX = "⚠️ Error processing this question"
+
+
+def _ask(qa_chain, question_id, query):
+    start = time.perf_counter()
+    answer = qa_chain.invoke({"query": query})
+    logger.info(f"{question_id} answered in {time.perf_counter() - start:.2f}s")
+    return answer
+
+
+def run_analysis(qa_chain, queries: dict, max_concurrency: int = MAX_CONCURRENCY):
+    """
+    Send all the queries to the chain at once and yield the answers as they arrive
+    :param qa_chain: chain exposing invoke({"query": ...})
+    :param queries: mapping question id -> full query
+    :param max_concurrency: max number of in-flight LLM calls
+    :return: generator of (question_id, answer) in completion order
+    """
+    workers = max(1, min(max_concurrency, len(queries)))
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+    try:
+        futures = {
+            executor.submit(_ask, qa_chain, question_id, query): question_id
+            for question_id, query in queries.items()
+        }
+        for future in as_completed(futures):
+            question_id = futures[future]
+            try:
+                yield question_id, future.result()
+            except Exception as e:
+                logger.error(f"{question_id} failed: {e}")
+                yield question_id, {"result": f"{ERROR_PREFIX}: {e}"}
+    finally:
+        # a closed generator (Streamlit rerun) drops the queued questions instead of waiting for them
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info(f"Analysis finished in {time.perf_counter() - start:.2f}s")
+
+
+def _stream(qa_chain, question_id, query, events, cancelled):
+    start = time.perf_counter()
+    first_token = None
+    try:
+        for chunk in qa_chain.stream({"query": query}):
+            if cancelled.is_set():
+                # nobody reads the answer anymore, stop consuming the LLM stream
+                logger.info(f"{question_id} cancelled")
+                return
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                logger.info(f"{question_id} time to first token: {first_token:.2f}s")
+            events.put((question_id, chunk, False))
+    except Exception as e:
+        logger.error(f"{question_id} failed: {e}")
+        events.put((question_id, f"\n\n{ERROR_PREFIX}: {e}", False))
+    logger.info(f"{question_id} streamed in {time.perf_counter() - start:.2f}s")
+    events.put((question_id, "", True))
+
+
+def stream_analysis(qa_chain, queries: dict, max_concurrency: int = MAX_CONCURRENCY):
+    """
+    Stream all the queries at once, tokens from the worker threads are handed back through a queue
+    so the caller can render them from the Streamlit script thread
+    :param qa_chain: chain exposing stream({"query": ...})
+    :param queries: mapping question id -> full query
+    :param max_concurrency: max number of in-flight LLM calls
+    :return: generator of (question_id, chunk, finished)
+    """
+    workers = max(1, min(max_concurrency, len(queries)))
+    events = queue.Queue()
+    cancelled = threading.Event()
+    pending = len(queries)
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+    try:
+        for question_id, query in queries.items():
+            executor.submit(_stream, qa_chain, question_id, query, events, cancelled)
+        while pending:
+            question_id, chunk, finished = events.get()
+            if finished:
+                pending -= 1
+            yield question_id, chunk, finished
+    finally:
+        # a closed generator (Streamlit rerun) stops the streams in flight and drops the queued ones
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info(f"Analysis finished in {time.perf_counter() - start:.2f}s")
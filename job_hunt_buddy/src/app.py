@@ -1,7 +1,11 @@
 # Libraries
 
-from ingestion import get_jd_from_url, get_pdf_text_pypdf, get_pdf_text_pdfplumber
-from rag_implementation import get_rag_chain
+from ingestion import get_jd_from_url, get_pdf_text
+from rag_implementation import get_rag_chain, get_embeddings, LLM_MODEL, PROMPT_VERSION
+from analysis import run_analysis, stream_analysis, ERROR_PREFIX
+from response_cache import ResponseCache
+from embedding_cache import content_hash
+from contextlib import closing
 from dotenv import load_dotenv
 import streamlit as st
 import os
@@ -23,6 +27,12 @@ logger = logging.getLogger("app")
 load_dotenv()
 open_api_key = os.getenv("OPENAI_API_KEY")
 
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(model=LLM_MODEL, prompt_version=PROMPT_VERSION)
+
+
 # Streamlit Configuration
 st.set_page_config(page_title="AI Job Hunt Assistant", page_icon="🚀", layout='wide')
 # Main Streamlit
@@ -39,6 +49,10 @@ with st.sidebar:
     jd_text = st.text_input("Job Description Raw Text")
     # Input 3: Upload the PDF
     uploaded_resume = st.file_uploader("Upload Candidate Resume (PDF)", type=["pdf"])
+    # Show the answers token by token instead of waiting for each full completion
+    stream_answers = st.toggle("Stream answers", value=True)
+    # Ignore the cached answers and ask the LLM again (the fresh answers are still cached)
+    bypass_cache = st.checkbox("Bypass response cache")
     # Button to trigger analysis
     submit = st.button("Analyse Candidate Resume")
 
@@ -89,9 +103,18 @@ if submit:
 
     # B. Get Resume Text
     with st.spinner("Extracting information from the resume .."):
-        resume_text = get_pdf_text_pdfplumber(uploaded_resume)
+        resume_text = get_pdf_text(uploaded_resume)
         st.success("✅ Done ..")
 
+    # Nothing to analyse (or to look up in the response cache) without both texts
+    if not job_description:
+        st.error("⚠️ Could not get the Job Description, check the URL or paste the text instead ...")
+        st.stop()  # Stop execution here
+
+    if not resume_text:
+        st.error("⚠️ Could not extract any text from the Resume PDF ...")
+        st.stop()  # Stop execution here
+
     if resume_text and job_description:
         with st.spinner("Processing Resume and Job Description..."):
             #st.success("✅ Data successfully extracted!")
@@ -103,10 +126,7 @@ if submit:
                 st.write(resume_text[:500] + "...")
 
     with st.spinner("Analysing Candidate Resume and Job Description.."):
-        # 1. Build the RAG Chain with the Resume Data
-        qa_chain = get_rag_chain(resume_text, uploaded_resume.name)
-
-        # 2. Define your questions
+        # 1. Define your questions
         questions = {
             "q1": "Does the candidate meet the required skills?",
             "q2": "Is the candidate a good fit for the job position?",
@@ -121,7 +141,7 @@ if submit:
                   "description and requirements"
         }
 
-        # 3. Run the Analysis
+        # 2. Run the Analysis
         st.markdown("---")
         st.subheader("📊 Analysis Results")
 
@@ -131,53 +151,92 @@ if submit:
         # We combine the Job Description as a context in the base query
         base_query = f"Based on this Job Description: \n\n {job_description} \n\n Answer this: "
 
+        # Build the layout first with an empty slot per question,
+        # the slots are filled in as soon as each answer arrives
+        slots = {}
         with tabs[0]:  # Q1, Q2, Q3
             st.markdown("### 🎯 Fit Assessment")
-            logger.info("Entering Fit Assessment")
-            logger.info("**Skills Check:** LLM Processing Q1")
-            q1_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q1']}"})
             with st.expander("**Skills Check:**"):
-                st.write(f"{q1_ans['result']}")
-
-            logger.info("Fit Check:** LLM Processing Q2")
-            q2_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q2']}"})
-            with st.expander("**Fit Check:**" ):
-                st.write(f"{q2_ans['result']}")
-
-            logger.info("**Match Details:** LLM Processing Q3")
-            q3_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q3']}"})
+                slots["q1"] = st.empty()
+            with st.expander("**Fit Check:**"):
+                slots["q2"] = st.empty()
             with st.expander("**Match Details:** "):
-                st.write(f"{q3_ans['result']}")
+                slots["q3"] = st.empty()
 
         with tabs[1]:  # Q4, Q5 , Q6
             st.markdown("### 📈 SWOT Analysis")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.info("Strengths",icon="💪")
-                ## LOGGING
-                q4_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q4']}"})
-                st.write(q4_ans['result'])
+                st.info("Strengths", icon="💪")
+                slots["q4"] = st.empty()
             with col2:
                 st.warning("Opportunities", icon="🌤️")
-                q5_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q5']}"})
-                st.write(q5_ans['result'])
+                slots["q5"] = st.empty()
             with col3:
-                st.error("Weaknesses",icon="🚨")
-                q6_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q6']}"})
-                st.write(q6_ans['result'])
+                st.error("Weaknesses", icon="🚨")
+                slots["q6"] = st.empty()
 
         with tabs[2]:  # Q7, Q8
             st.markdown("### 📝 Application Kit")
-            q7_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q7']}"})
             with st.expander("Draft Cover Letter"):
-                st.write(q7_ans['result'])
-            q8_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q8']}"})
+                slots["q7"] = st.empty()
             with st.expander("**How to Stand Out:**"):
-                st.write(f"{q8_ans['result']}")
-        with tabs[3]: # Q9
+                slots["q8"] = st.empty()
+
+        with tabs[3]:  # Q9
             st.markdown("### 💬 STAR Framework speech ")
-            q9_ans = qa_chain.invoke({"query": f"{base_query}\n\n{questions['q9']}"})
-            st.write(f"**STAR Framework**\n{q9_ans['result']}")
+            slots["q9"] = st.empty()
+
+        for question_id, slot in slots.items():
+            slot.caption("⏳ Waiting for the analysis ..")
+
+        def render(question_id, text):
+            if question_id == "q9":
+                slots[question_id].write(f"**STAR Framework**\n{text}")
+            else:
+                slots[question_id].write(text)
+
+        # 3. Answers of the same resume against the same (or a near identical) posting come from the cache
+        response_cache = get_response_cache()
+        resume_hash = content_hash(resume_text)
+        jd_hash = response_cache.resolve_jd(resume_hash, job_description, embed=get_embeddings().embed_query)
+        queries = {}
+        for question_id, question in questions.items():
+            cached_answer = None if bypass_cache else response_cache.get(resume_hash, jd_hash, question_id)
+            if cached_answer is not None:
+                logger.info(f"{question_id} served from the response cache")
+                render(question_id, cached_answer)
+            else:
+                queries[question_id] = f"{base_query}\n\n{question}"
+
+        def save(question_id, text):
+            # failed answers are not cached
+            if ERROR_PREFIX not in text:
+                response_cache.put(resume_hash, jd_hash, question_id, text)
+
+        # 4. Send the remaining questions at once and render each answer as it arrives
+        if queries:
+            # Build the RAG Chain with the Resume Data
+            # the resume context is retrieved once for the Job Description and reused by every question
+            qa_chain = get_rag_chain(resume_text, uploaded_resume.name, job_description=job_description)
+
+            if stream_answers:
+                answers = {question_id: "" for question_id in queries}
+                # closed as soon as a rerun interrupts the loop, the LLM calls still in flight are dropped
+                with closing(stream_analysis(qa_chain, queries)) as events:
+                    for question_id, chunk, finished in events:
+                        answers[question_id] += chunk
+                        if finished:
+                            logger.info(f"Rendering {question_id}")
+                            save(question_id, answers[question_id])
+                        if answers[question_id]:
+                            render(question_id, answers[question_id] + ("" if finished else " ▌"))
+            else:
+                with closing(run_analysis(qa_chain, queries)) as answers:
+                    for question_id, answer in answers:
+                        logger.info(f"Rendering {question_id}")
+                        render(question_id, answer['result'])
+                        save(question_id, answer['result'])
 
         st.success("✅ Data successfully Processed!")
 
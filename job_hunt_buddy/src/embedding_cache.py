@@ -0,0 +1,125 @@
+from langchain_core.embeddings import Embeddings
+from typing import List
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+# Logging configuration
+import logging
+from rich.logging import RichHandler
+
+# Configure basic config with RichHandler
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(message)s", # Rich handles the timestamp and level separately
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)]
+)
+
+logger = logging.getLogger("embedding_cache")
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.db")
+CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content addressed embedding cache persisted in SQLite.
+    Every text is keyed by the hash of (model, text) so identical chunks are embedded only once,
+    no matter the name of the file they came from. Least recently used entries are evicted
+    once the cache grows past max_entries.
+    """
+
+    def __init__(self, underlying: Embeddings, path: str = CACHE_PATH,
+                 max_entries: int = CACHE_MAX_ENTRIES, namespace: str = ""):
+        self.underlying = underlying
+        self.max_entries = max_entries
+        self.namespace = namespace or getattr(underlying, "model", "")
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return content_hash(f"{self.namespace}\0{text}")
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            # Stay below the SQLite host parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, items: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+            )
+            # LRU eviction
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                self.stats["evictions"] += overflow
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(list(set(keys)))
+
+        # Embed the missing texts in a single call, duplicates only once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        hits = len(texts) - len(missing)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(missing)
+        logger.info(f"Embedding cache: {hits} hits, {len(missing)} misses (totals {self.stats})")
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
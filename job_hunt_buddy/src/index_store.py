@@ -0,0 +1,171 @@
+from langchain_community.vectorstores import FAISS
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
+import tempfile
+import shutil
+import time
+import os
+
+# Logging configuration
+import logging
+from rich.logging import RichHandler
+
+# Configure basic config with RichHandler
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(message)s", # Rich handles the timestamp and level separately
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)]
+)
+
+logger = logging.getLogger("index_store")
+
+INDEX_DIR = os.getenv("VECTOR_DB_DIR", "vector_db")
+INDEX_MAX_ON_DISK = int(os.getenv("VECTOR_DB_MAX_INDEXES", "200"))
+INDEX_TTL_SECONDS = int(os.getenv("VECTOR_DB_TTL_SECONDS", str(7 * 24 * 3600)))
+INDEX_MAX_IN_MEMORY = int(os.getenv("VECTOR_DB_MAX_IN_MEMORY", "16"))
+# Streamlit sessions are threads of the same process, with the shared pool a hot index
+# is deserialized once and served to every session
+INDEX_SHARED_POOL = os.getenv("VECTOR_DB_SHARED_POOL", "1") == "1"
+
+
+class IndexStore:
+    """
+    Bounded store of FAISS indexes.
+    Each index lives in its own folder out_dir/<key>/ written through a temporary folder
+    and renamed into place, so a reader never sees a half written index.
+    Indexes on disk are evicted by TTL and LRU (folder mtime is touched on every hit,
+    memory hits included),
+    recently used indexes are also kept loaded in memory and new indexes are written
+    to disk by a background thread.
+    """
+
+    def __init__(self, out_dir: str = INDEX_DIR, capacity: int = INDEX_MAX_ON_DISK,
+                 ttl: int = INDEX_TTL_SECONDS, memory_capacity: int = INDEX_MAX_IN_MEMORY):
+        self.out_dir = out_dir
+        self.capacity = capacity
+        self.ttl = ttl
+        self.memory_capacity = memory_capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # single writer so the folder is never written by two threads at once
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index_writer")
+        os.makedirs(out_dir, exist_ok=True)
+        self._remove_legacy_files()
+
+    def _remove_legacy_files(self):
+        """
+        Older versions saved every index flat as out_dir/index_<name>.faiss and .pkl,
+        keyed by file name rather than content, they can't be reused so drop them once
+        """
+        for name in os.listdir(self.out_dir):
+            path = self._path(name)
+            if name.startswith("index_") and name.endswith((".faiss", ".pkl")) and os.path.isfile(path):
+                logger.info(f"Removing legacy index file {path}")
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _touch(self, key: str):
+        # mark as recently used, the folder may not be written yet or already evicted
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.out_dir, key)
+
+    def _remember(self, key: str, vector_store):
+        with self._lock:
+            self._memory[key] = vector_store
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_capacity:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str, embeddings):
+        """Return the index for key or None, memory first then disk"""
+        with self._lock:
+            vector_store = self._memory.get(key)
+            if vector_store is not None:
+                self._memory.move_to_end(key)
+        if vector_store is not None:
+            logger.info(f"Index {key} served from memory")
+            # keep a hot index from expiring on disk
+            self._touch(key)
+            return vector_store
+
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            logger.info(f"Index {key} expired")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        logger.info(f"Loading index {key} from disk")
+        vector_store = FAISS.load_local(
+            folder_path=path,
+            embeddings=embeddings,
+            allow_dangerous_deserialization=True,
+        )
+        self._touch(key)
+        self._remember(key, vector_store)
+        return vector_store
+
+    def put(self, key: str, vector_store, background: bool = True):
+        """Keep the index in memory and persist it atomically, by default off the request path"""
+        self._remember(key, vector_store)
+        if background:
+            future = self._writer.submit(self._persist, key, vector_store)
+            future.add_done_callback(self._log_failure)
+            return future
+        self._persist(key, vector_store)
+
+    @staticmethod
+    def _log_failure(future):
+        if future.exception():
+            logger.error(f"Error saving index: {future.exception()}")
+
+    def _persist(self, key: str, vector_store):
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key}.", dir=self.out_dir)
+        try:
+            vector_store.save_local(folder_path=tmp_dir)
+            try:
+                os.rename(tmp_dir, self._path(key))
+            except OSError:
+                # Another session already stored the same content
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info(f"Index {key} saved")
+        self.evict()
+
+    def flush(self):
+        """Wait for the pending background writes"""
+        self._writer.submit(lambda: None).result()
+
+    def evict(self):
+        """Drop expired indexes, then the least recently used ones above capacity"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.out_dir):
+            path = self._path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if now - mtime > self.ttl:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append((mtime, path))
+
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.capacity)]:
+            logger.info(f"Evicting index {path}")
+            shutil.rmtree(path, ignore_errors=True)
@@ -1,6 +1,10 @@
-from langchain_community.document_loaders import WebBaseLoader
-from typing import Optional
+from jd_fetcher import JDFetcher
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Iterator, List
 import streamlit as st
+import threading
+import io
+import os
 import logging
 
 import logging
@@ -22,6 +26,10 @@ Pending wrapper Funtion to validate and sanitize the input
 """
 
 
+# One fetcher per process, its HTTP session and disk cache are shared by every request
+jd_fetcher = JDFetcher()
+
+
 def get_jd_from_url(url) -> Optional[str]:
     """
 
@@ -29,26 +37,21 @@ def get_jd_from_url(url) -> Optional[str]:
     :return:
     """
     try:
-        logger.info(f"Loading URL .. {url}")
-        loader = WebBaseLoader(url)
-        docs = loader.load()
-        # Conbine content from all pages found (maybe just one)
-        return " ".join([d.page_content for d in docs])
+        return jd_fetcher.fetch(url)
     except Exception as e:
         st.error(f"Error fetching URL: {e}")
         return None
 
 
 # Function 2: Extract Text from Uploaded PDF
-def get_pdf_text_pypdf(uploaded_file, verbose=False) -> Optional[tuple]:
+def get_pdf_text_pypdf(uploaded_file, verbose=False) -> Optional[str]:
     import pypdf
     try:
         # Read the PDF file directly from the stream
         logger.info(f"Reading PDF. {uploaded_file}")
         pdf_reader = pypdf.PdfReader(uploaded_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+        # extract_text() returns None on pages without text
+        text = "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
         if verbose:
             logger.info(f"Extracted Text\n\n {text}")
         return text
@@ -57,14 +60,12 @@ def get_pdf_text_pypdf(uploaded_file, verbose=False) -> Optional[tuple]:
         return None
 
 
-def get_pdf_text_pdfplumber(uploaded_file, verbose=False)-> Optional[tuple]:
+def get_pdf_text_pdfplumber(uploaded_file, verbose=False)-> Optional[str]:
     import pdfplumber
     try:
         logger.info(f"Reading PDF. {uploaded_file}")
         with pdfplumber.open(uploaded_file) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text()
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
             if verbose:
                 logger.info(f"Extracted Text\n\n {text}")
             return text
@@ -73,4 +74,95 @@ def get_pdf_text_pdfplumber(uploaded_file, verbose=False)-> Optional[tuple]:
         return None
 
 
+# Page parallel extraction
+PDF_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+# Pages handled by each worker task
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+# Below this many pages (a typical resume) starting workers, shipping them the PDF and
+# reparsing it costs more than it saves, the document is extracted in process
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+# One worker pool per process, created on the first large document and reused by every session
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def _extract_page_range(pdf_bytes: bytes, engine: str, start: int, stop: int) -> List[str]:
+    # Runs in a worker process, every worker opens its own reader on the PDF bytes
+    if engine == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+    import pypdf
+    reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _probe_engine(pdf_bytes: bytes) -> tuple:
+    """
+    Pick the extraction engine from a quick look at the first page:
+    pypdf is much faster, pdfplumber is used when pypdf finds no text on it
+    :return: (engine, number of pages)
+    """
+    import pypdf
+    reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+    n_pages = len(reader.pages)
+    if n_pages and (reader.pages[0].extract_text() or "").strip():
+        return "pypdf", n_pages
+    try:
+        import pdfplumber  # noqa: F401
+        return "pdfplumber", n_pages
+    except ImportError:
+        return "pypdf", n_pages
+
+
+def iter_pdf_pages(uploaded_file, engine: Optional[str] = None, workers: int = PDF_WORKERS) -> Iterator[str]:
+    """
+    Yield the text of each page in order, page ranges of large documents are extracted
+    in parallel by the shared worker pool
+    :param uploaded_file: file like object or path of the PDF
+    :param engine: "pypdf", "pdfplumber" or None to probe
+    :param workers: max worker processes
+    :return: generator of page texts
+    """
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, "rb") as f:
+            pdf_bytes = f.read()
+    else:
+        uploaded_file.seek(0)
+        pdf_bytes = uploaded_file.read()
+
+    probed_engine, n_pages = _probe_engine(pdf_bytes)
+    engine = engine or probed_engine
+    logger.info(f"Extracting {n_pages} pages with {engine}")
+
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, n_pages)) for start in range(0, n_pages, PDF_PAGES_PER_TASK)]
+    if workers <= 1 or n_pages < PDF_PARALLEL_MIN_PAGES or len(ranges) <= 1:
+        yield from _extract_page_range(pdf_bytes, engine, 0, n_pages)
+        return
+
+    executor = _get_pool(workers)
+    futures = [executor.submit(_extract_page_range, pdf_bytes, engine, start, stop) for start, stop in ranges]
+    for future in futures:
+        yield from future.result()
 
+
+def get_pdf_text(uploaded_file, engine: Optional[str] = None, verbose=False) -> Optional[str]:
+    try:
+        logger.info(f"Reading PDF. {uploaded_file}")
+        # join once at the end instead of growing the string page by page
+        text = "\n".join(iter_pdf_pages(uploaded_file, engine=engine))
+        if verbose:
+            logger.info(f"Extracted Text\n\n {text}")
+        return text
+    except Exception as e:
+        st.error(f"Error reading PDF: {e}")
+        return None
@@ -0,0 +1,141 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+from typing import Optional
+import requests
+import tempfile
+import hashlib
+import json
+import time
+import os
+
+# Logging configuration
+import logging
+from rich.logging import RichHandler
+
+# Configure basic config with RichHandler
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(message)s", # Rich handles the timestamp and level separately
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)]
+)
+
+logger = logging.getLogger("jd_fetcher")
+
+JD_CACHE_DIR = os.getenv("JD_CACHE_DIR", "cache/job_descriptions")
+JD_CACHE_TTL_SECONDS = int(os.getenv("JD_CACHE_TTL_SECONDS", str(24 * 3600)))
+# (connect, read) timeouts in seconds
+JD_FETCH_TIMEOUT = (float(os.getenv("JD_CONNECT_TIMEOUT", "5")), float(os.getenv("JD_READ_TIMEOUT", "15")))
+
+# Query parameters that do not change the posting
+TRACKING_PARAMS = {"trk", "trackingid", "refid", "ref", "src", "source", "fbclid", "gclid"}
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme and host, drop the fragment and the tracking parameters, sort the query"""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return soup.get_text(" ", strip=True)
+
+
+def build_session(pool_size: int = 10) -> requests.Session:
+    """HTTP session with keep-alive connection pooling and retries on transient errors"""
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+class JDFetcher:
+    """
+    Job description fetcher with a pooled HTTP session, strict timeouts and an on-disk cache
+    keyed by the normalized URL. Fresh entries (younger than ttl) are served from disk,
+    stale ones are revalidated with ETag / Last-Modified conditional requests, and still served
+    when the request fails.
+    """
+
+    def __init__(self, cache_dir: str = JD_CACHE_DIR, ttl: int = JD_CACHE_TTL_SECONDS,
+                 timeout: tuple = JD_FETCH_TIMEOUT, session: Optional[requests.Session] = None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session or build_session()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, url: str) -> str:
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, path: str) -> Optional[dict]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self, path: str, entry: dict):
+        # write then rename, concurrent sessions never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url: str) -> str:
+        path = self._cache_path(url)
+        entry = self._read_cache(path)
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            logger.info(f"Job description served from cache: {url}")
+            return entry["text"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        logger.info(f"Loading URL .. {url}")
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                logger.info(f"Job description not modified: {url}")
+                entry["fetched_at"] = time.time()
+                self._write_cache(path, entry)
+                return entry["text"]
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if not entry:
+                raise
+            # a stale copy beats no job description, it is revalidated on the next fetch
+            logger.warning(f"Fetching {url} failed ({e}), serving the cached copy")
+            return entry["text"]
+
+        text = html_to_text(response.text)
+        self._write_cache(path, {
+            "url": normalize_url(url),
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "text": text,
+        })
+        return text
@@ -1,9 +1,10 @@
 # 1. Text Splitting
 # (Remains largely the same, but often imported from langchain_text_splitters in newer docs)
 import os
+from functools import lru_cache
 
+import httpx
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_classic.chains.retrieval_qa.base import RetrievalQA
 # Embeddings & Chat Model
 # (Now live in the dedicated langchain_openai package)
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
@@ -14,6 +15,9 @@ from langchain_community.vectorstores import FAISS
 # Prompts
 # (ChatPromptTemplate is preferred over PromptTemplate for Chat Models)
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from embedding_cache import CachedEmbeddings, content_hash
+from index_store import IndexStore, INDEX_MAX_IN_MEMORY, INDEX_SHARED_POOL
 # 5. Chains
 #from langchain_classic.chains import create_retrieval_chain
 #from langchain_classic.chains.combine_documents import create_stuff_documents_chain
@@ -37,63 +41,16 @@ logger = logging.getLogger("rag")
 # load the env variables
 load_dotenv(dotenv_path=".env")
 
-def clean_filename(name: str):
-    import re
-    name = name.replace(".pdf", "")
-    return re.sub(r"[^a-zA-Z0-9_-]", "_", name)
+# Process wide store of the FAISS indexes (vector_db folder)
+index_store = IndexStore(memory_capacity=INDEX_MAX_IN_MEMORY if INDEX_SHARED_POOL else 0)
 
-def get_rag_chain(resume_text, resume_file_name):
+LLM_MODEL = "gpt-4o"  # Use gpt-4 or gpt-3.5-turbo
+# Bump when prompt_template changes, cached answers of older prompts are then ignored
+PROMPT_VERSION = "v1"
 
-    # 1. Split the text into chunks
-    logger.info("Split text into chunks")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    chunks = text_splitter.split_text(resume_text)
-
-    # 2. Create Embeddings & Vector Store
-    # This turns text into vectors so we can search it
-    # Initialize the OpenAI Embeddings model with API credentials
-    logger.info("Create Embeddings & Vector Store")
-    embeddings = OpenAIEmbeddings(
-        openai_api_key=os.getenv("OPENAI_API_KEY"),  #  OpenAI API key for authentication
-        openai_api_base=os.getenv("OPENAI_API_BASE")  # OpenAI API base URL endpoint
-    )
-    ## Check if the Vector Store exist
-    # DB Persistence
-    # Vector DB folder
-    out_dir = 'vector_db'  # name of the vector database
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-    db_index_file_name = f"index_{clean_filename(resume_file_name)}"
-    db_faiss_path = f"{out_dir}/{db_index_file_name}.faiss"
-    if os.path.exists(db_faiss_path):
-        logger.info("Existing vector store found. Loading...")
-        # Load existing
-        vectorstore_local = FAISS.load_local(
-            folder_path=out_dir,
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True,
-            index_name=f"{db_index_file_name}"
-        )
-    else:
-        print("No vector store found. Creating new embeddings...")
-        vector_store = FAISS.from_texts(chunks, embedding=embeddings)
-        vector_store.save_local(folder_path=out_dir, index_name=f"{db_index_file_name}")
-        logger.info("Vector store saved successfully.")
-        logger.info("Loading New Vector Store ..")
-        vectorstore_local = FAISS.load_local(
-            folder_path=out_dir,
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True,
-            index_name=f"{db_index_file_name}"
-        )
-
-    # 3. Setup the Retriever
-    # We will retrieve the top 3 most relevant chunks of the resume
-    retriever = vectorstore_local.as_retriever(search_type="similarity", search_kwargs={"k": 3})
-
-    # 4. Define the Prompt
-    # This tells the LLM how to behave
-    prompt_template = """
+# Define the Prompt
+# This tells the LLM how to behave
+prompt_template = """
     You are an expert IT Recruiter. 
     Analyse and Interpret the following pieces of context (Candidate Resume) and use it to answer the question based on the Job Description provided.
 
@@ -107,19 +64,130 @@ def get_rag_chain(resume_text, resume_file_name):
     2- Fairly Analyze and Interpret the candidate resume based on the job description and provide a professional assessment.
     """
 
-    PROMPT = PromptTemplate(
-        template=prompt_template, input_variables=["context", "question"]
+
+# Clients are cached at process level: Streamlit reruns the whole script on every interaction,
+# with the cache only the per-resume retriever is built per request and the HTTP connections
+# (and their TLS sessions) are kept alive between requests
+@lru_cache(maxsize=None)
+def get_http_clients():
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=120)
+    timeout = httpx.Timeout(120.0, connect=10.0)
+    return httpx.Client(limits=limits, timeout=timeout), httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings() -> CachedEmbeddings:
+    # Initialize the OpenAI Embeddings model with API credentials
+    http_client, http_async_client = get_http_clients()
+    embeddings = OpenAIEmbeddings(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),  #  OpenAI API key for authentication
+        openai_api_base=os.getenv("OPENAI_API_BASE"),  # OpenAI API base URL endpoint
+        http_client=http_client,
+        http_async_client=http_async_client
     )
+    # Chunks are cached by content, unchanged chunks of a re-uploaded or edited resume are not embedded again
+    return CachedEmbeddings(embeddings)
+
+
+@lru_cache(maxsize=None)
+def get_llm() -> ChatOpenAI:
+    http_client, http_async_client = get_http_clients()
+    return ChatOpenAI(model=LLM_MODEL, temperature=0,
+                      http_client=http_client, http_async_client=http_async_client)
 
-    # 5. Create the Chain
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)  # Use gpt-4 or gpt-3.5-turbo
 
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        chain_type="stuff",
-        retriever=retriever,
-        return_source_documents=True,
-        chain_type_kwargs={"prompt": PROMPT}
+@lru_cache(maxsize=None)
+def get_prompt() -> PromptTemplate:
+    return PromptTemplate(
+        template=prompt_template, input_variables=["context", "question"]
     )
 
-    return qa_chain
\ No newline at end of file
+
+@lru_cache(maxsize=None)
+def get_llm_chain():
+    return get_prompt() | get_llm() | StrOutputParser()
+
+
+def format_docs(docs) -> str:
+    # Same layout the "stuff" chain used to put the chunks in the prompt
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+class ResumeQA:
+    """
+    Minimal retrieval QA chain, exposes the same invoke({"query": ...}) contract as RetrievalQA.
+    When shared_docs is provided the retrieval is skipped and the same resume
+    context is reused for every question (retrieve once, answer many).
+    """
+
+    def __init__(self, retriever, llm_chain, shared_docs=None):
+        self.retriever = retriever
+        self.llm_chain = llm_chain
+        self.shared_docs = shared_docs
+
+    def get_context(self, query):
+        if self.shared_docs is not None:
+            return self.shared_docs
+        return self.retriever.invoke(query)
+
+    def invoke(self, inputs: dict) -> dict:
+        docs = self.get_context(inputs["query"])
+        result = self.llm_chain.invoke({"context": format_docs(docs), "question": inputs["query"]})
+        return {"query": inputs["query"], "result": result, "source_documents": docs}
+
+    def stream(self, inputs: dict):
+        """Yield the answer tokens as the LLM produces them"""
+        docs = self.get_context(inputs["query"])
+        yield from self.llm_chain.stream({"context": format_docs(docs), "question": inputs["query"]})
+
+
+def get_rag_chain(resume_text, resume_file_name, job_description=None):
+    """
+    Build the QA chain over the candidate resume
+    :param resume_text: text extracted from the resume
+    :param resume_file_name: uploaded file name
+    :param job_description: when provided, the resume context is retrieved once for
+                            the job description and shared across all the questions
+    :return: ResumeQA
+    """
+
+    # 1. Split the text into chunks
+    logger.info("Split text into chunks")
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    chunks = text_splitter.split_text(resume_text)
+
+    # 2. Create Embeddings & Vector Store
+    # This turns text into vectors so we can search it
+    logger.info("Create Embeddings & Vector Store")
+    embeddings = get_embeddings()
+    ## Check if the Vector Store exist
+    # DB Persistence, the index store bounds the vector_db folder and keeps recent indexes in memory
+    # The index is named after the resume content, not the file name,
+    # so two resumes sharing a file name never reuse each other's vectors
+    db_index_file_name = f"index_{content_hash(resume_text)[:32]}"
+    logger.info(f"Vector store for {resume_file_name}: {db_index_file_name}")
+    vectorstore_local = index_store.get(db_index_file_name, embeddings)
+    if vectorstore_local is not None:
+        logger.info("Existing vector store found.")
+    else:
+        logger.info("No vector store found. Creating new embeddings...")
+        vectorstore_local = FAISS.from_texts(chunks, embedding=embeddings)
+        # Use the in-memory store right away, it is written to disk in the background
+        index_store.put(db_index_file_name, vectorstore_local)
+
+    # 3. Setup the Retriever
+    # We will retrieve the top 3 most relevant chunks of the resume
+    retriever = vectorstore_local.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+
+    # 4. Prompt and LLM are built once per process and reused by every request
+    llm_chain = get_llm_chain()
+
+    # 5. Shared context mode: embed the job description and search the resume only once
+    shared_docs = None
+    if job_description:
+        logger.info("Retrieving shared resume context for the Job Description")
+        shared_docs = retriever.invoke(job_description)
+
+    qa_chain = ResumeQA(retriever, llm_chain, shared_docs=shared_docs)
+
+    return qa_chain
@@ -0,0 +1,147 @@
+from typing import Optional, Callable, List
+from embedding_cache import content_hash
+import numpy as np
+import threading
+import sqlite3
+import time
+import re
+import os
+
+# Logging configuration
+import logging
+from rich.logging import RichHandler
+
+# Configure basic config with RichHandler
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(message)s", # Rich handles the timestamp and level separately
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)]
+)
+
+logger = logging.getLogger("response_cache")
+
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "cache/responses.db")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Cosine similarity above which two job descriptions are considered the same posting,
+# empty disables the approximate match
+RESPONSE_CACHE_SIMILARITY = os.getenv("RESPONSE_CACHE_SIMILARITY", "")
+
+
+def normalize_jd(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class ResponseCache:
+    """
+    Local cache of the LLM answers keyed by
+    (resume content hash, normalized job description hash, question id, model, prompt version).
+    Optionally a job description close enough (cosine similarity of the embeddings)
+    to an already analysed one for the same resume reuses its answers.
+    Entries older than ttl are evicted.
+    """
+
+    def __init__(self, model: str, prompt_version: str, path: str = RESPONSE_CACHE_PATH,
+                 ttl: int = RESPONSE_CACHE_TTL_SECONDS,
+                 similarity_threshold: Optional[float] = float(RESPONSE_CACHE_SIMILARITY) if RESPONSE_CACHE_SIMILARITY else None):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " resume_hash TEXT NOT NULL,"
+            " jd_hash TEXT NOT NULL,"
+            " question_id TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " prompt_version TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (resume_hash, jd_hash, question_id, model, prompt_version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jd_embeddings ("
+            " jd_hash TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop the entries older than the TTL"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM jd_embeddings WHERE created_at < ?", (cutoff,))
+            self._conn.commit()
+
+    def resolve_jd(self, resume_hash: str, job_description: str,
+                   embed: Optional[Callable[[str], List[float]]] = None) -> str:
+        """
+        Return the job description key to use for this resume, either the exact hash
+        or the hash of a similar job description already analysed against the same resume
+        """
+        jd_hash = content_hash(normalize_jd(job_description))
+        if self.similarity_threshold is None or embed is None:
+            return jd_hash
+
+        with self._lock:
+            exact = self._conn.execute(
+                "SELECT 1 FROM responses WHERE resume_hash = ? AND jd_hash = ? AND model = ? AND prompt_version = ? LIMIT 1",
+                (resume_hash, jd_hash, self.model, self.prompt_version)
+            ).fetchone()
+        if exact:
+            return jd_hash
+
+        vector = np.asarray(embed(job_description), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT DISTINCT e.jd_hash, e.vector FROM responses r JOIN jd_embeddings e ON e.jd_hash = r.jd_hash "
+                "WHERE r.resume_hash = ? AND r.model = ? AND r.prompt_version = ?",
+                (resume_hash, self.model, self.prompt_version)
+            ).fetchall()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jd_embeddings (jd_hash, vector, created_at) VALUES (?, ?, ?)",
+                (jd_hash, vector.tobytes(), time.time())
+            )
+            self._conn.commit()
+
+        best_hash, best_score = jd_hash, -1.0
+        for candidate_hash, blob in candidates:
+            score = float(np.dot(vector, np.frombuffer(blob, dtype=np.float32)))
+            if score > best_score:
+                best_hash, best_score = candidate_hash, score
+        if best_score >= self.similarity_threshold:
+            logger.info(f"Job description matched a cached one (similarity {best_score:.3f})")
+            return best_hash
+        return jd_hash
+
+    def get(self, resume_hash: str, jd_hash: str, question_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM responses WHERE resume_hash = ? AND jd_hash = ? AND question_id = ? "
+                "AND model = ? AND prompt_version = ? AND created_at >= ?",
+                (resume_hash, jd_hash, question_id, self.model, self.prompt_version, time.time() - self.ttl)
+            ).fetchone()
+        self.stats["hits" if row else "misses"] += 1
+        return row[0] if row else None
+
+    def put(self, resume_hash: str, jd_hash: str, question_id: str, answer: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(resume_hash, jd_hash, question_id, model, prompt_version, answer, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (resume_hash, jd_hash, question_id, self.model, self.prompt_version, answer, time.time())
+            )
+            self._conn.commit()
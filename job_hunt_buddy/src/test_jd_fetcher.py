@@ -0,0 +1,84 @@
+"""
+JDFetcher against a local http.server stub.
+
+    pytest test_jd_fetcher.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+import requests
+
+from jd_fetcher import JDFetcher
+
+POSTING = "<html><head><script>var x;</script></head><body><h1>Data Engineer</h1><p>Python, SQL</p></body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # path -> status the stub answers with, requests seen by the server
+    statuses = {}
+    seen = []
+
+    def do_GET(self):
+        type(self).seen.append((self.path, self.headers.get("If-None-Match")))
+        status = type(self).statuses.get(self.path, 200)
+        if status == 200 and self.headers.get("If-None-Match") == '"v1"':
+            status = 304
+        self.send_response(status)
+        if status == 200:
+            body = POSTING.encode("utf-8")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StubHandler.statuses, StubHandler.seen = {}, []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetcher(cache_dir, ttl=3600):
+    # plain session: no retries, the error statuses reach the fetcher directly
+    return JDFetcher(cache_dir=str(cache_dir), ttl=ttl, timeout=(2, 2), session=requests.Session())
+
+
+def test_fetch_and_cache(server, tmp_path):
+    jd = fetcher(tmp_path)
+    assert jd.fetch(f"{server}/job") == "Data Engineer Python, SQL"
+    # fresh entry, tracking parameters and fragment don't change the cache key
+    assert jd.fetch(f"{server}/job?utm_source=mail#apply") == "Data Engineer Python, SQL"
+    assert StubHandler.seen == [("/job", None)]
+
+
+def test_revalidate_with_etag(server, tmp_path):
+    jd = fetcher(tmp_path, ttl=0)
+    first = jd.fetch(f"{server}/job")
+    assert jd.fetch(f"{server}/job") == first
+    assert StubHandler.seen == [("/job", None), ("/job", '"v1"')]
+
+
+def test_error_status(server, tmp_path):
+    StubHandler.statuses["/gone"] = 404
+    with pytest.raises(requests.HTTPError):
+        fetcher(tmp_path).fetch(f"{server}/gone")
+
+
+def test_stale_copy_served_on_error(server, tmp_path):
+    jd = fetcher(tmp_path, ttl=0)
+    text = jd.fetch(f"{server}/job")
+    StubHandler.statuses["/job"] = 500
+    assert jd.fetch(f"{server}/job") == text